@@ -1,5 +1,9 @@
 
-from itertools import combinations
+import argparse
+import math
+import random
+import time
+from collections import namedtuple
 
 transactions = [
     ['milk', 'bread', 'butter'],
@@ -11,25 +15,68 @@ transactions = [
 
 min_support = 0.6  
 min_confidence = 0.7  
-def create_candidates(frequent_itemsets, k):
+def join_and_prune(frequent_tuples):
+    """Classic Apriori candidate generation over sorted (k-1)-item tuples.
+
+    Two frequent (k-1)-itemsets sharing their first k-2 items are joined
+    into a k-candidate, which is kept only if every (k-1)-subset of it is
+    frequent as well (downward closure).
+    """
+    frequent = set(frequent_tuples)
+    by_prefix = {}
+    for itemset in sorted(frequent):
+        by_prefix.setdefault(itemset[:-1], []).append(itemset[-1])
     candidates = []
-    items = set()
-    for itemset in frequent_itemsets:
-        for item in itemset:
-            items.add(item)
-    items = list(items)
-    for combination in combinations(items, k):
-        candidates.append(set(combination))
+    for prefix, lasts in by_prefix.items():
+        for i in range(len(lasts)):
+            for j in range(i + 1, len(lasts)):
+                candidate = prefix + (lasts[i], lasts[j])
+                # Dropping either of the last two items gives the joined pair itself.
+                if all(candidate[:m] + candidate[m + 1:] in frequent for m in range(len(prefix))):
+                    candidates.append(candidate)
     return candidates
 
+def create_candidates(frequent_itemsets, k):
+    items = sorted({item for itemset in frequent_itemsets for item in itemset}, key=repr)
+    rank = {item: r for r, item in enumerate(items)}
+    frequent_tuples = [
+        tuple(sorted(rank[item] for item in itemset)) for itemset in frequent_itemsets if len(itemset) == k - 1
+    ]
+    return [set(items[r] for r in candidate) for candidate in join_and_prune(frequent_tuples)]
+
+# Transactions encoded once as one int bitset per item: bit i of
+# item_bits[item] is set when transaction i contains the item. The support
+# of an itemset is then the popcount of the AND of its items' bitsets.
+EncodedTransactions = namedtuple("EncodedTransactions", ["item_bits", "n_transactions"])
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(bits):
+        return bin(bits).count("1")
+
+def encode_transactions(transactions):
+    n = len(transactions)
+    item_bytes = {}
+    for i, transaction in enumerate(transactions):
+        byte, mask = i >> 3, 1 << (i & 7)
+        for item in transaction:
+            if item not in item_bytes:
+                item_bytes[item] = bytearray((n + 7) // 8)
+            item_bytes[item][byte] |= mask
+    item_bits = {item: int.from_bytes(b, "little") for item, b in item_bytes.items()}
+    return EncodedTransactions(item_bits, n)
+
 def calculate_support(transactions, candidates):
+    if not isinstance(transactions, EncodedTransactions):
+        transactions = encode_transactions(transactions)
+    item_bits, n = transactions
     support_count = {}
     for candidate in candidates:
-        count = 0
-        for transaction in transactions:
-            if candidate.issubset(transaction):
-                count += 1
-        support_count[frozenset(candidate)] = count / len(transactions)
+        bits = -1
+        for item in candidate:
+            bits &= item_bits.get(item, 0)
+        support_count[frozenset(candidate)] = popcount(bits) / n if n else 0.0
     return support_count
 
 def filter_itemsets(support_count, min_support):
@@ -39,48 +86,183 @@ def filter_itemsets(support_count, min_support):
             frequent_itemsets.append(set(itemset))
     return frequent_itemsets
 
-def apriori(transactions, min_support):
-    transactions = list(map(set, transactions))
-    
-    items = set()
-    for transaction in transactions:
-        for item in transaction:
-            items.add(item)
-    candidates = [set([item]) for item in items]
-    
+def apriori(transactions, min_support, return_support=False):
+    """Frequent itemsets as a list of sets.
+
+    With return_support=True, also returns the support table computed along
+    the way ({frozenset(itemset): support}) so generate_rules can reuse it.
+    """
+    transactions = encode_transactions(list(map(set, transactions)))
+    items = list(transactions.item_bits)
+    n = transactions.n_transactions
+
+    # Candidates are tuples of item ranks in ascending order. Like the nodes
+    # of a prefix trie, each frequent itemset keeps its transaction bitset,
+    # so a k-candidate costs one AND: bitset(prefix) & bitset(last item).
+    # A candidate's bitset is counted as soon as it is built and dropped
+    # unless it is frequent, so only two levels of frequent bitsets are
+    # ever alive at once.
+    item_bits = [transactions.item_bits[item] for item in items]
+
     all_frequent_itemsets = []
-    k = 1
-    while candidates:
-        support_count = calculate_support(transactions, candidates)
-        frequent_itemsets = filter_itemsets(support_count, min_support)
-        if frequent_itemsets:
-            all_frequent_itemsets.extend(frequent_itemsets)
-        k += 1
-        candidates = create_candidates(frequent_itemsets, k)
+    support_table = {}
+    frequent_bits = {}
+    candidates = (((r,), bits) for r, bits in enumerate(item_bits))
+    while n:
+        for c, bits in candidates:
+            support = popcount(bits) / n
+            if support >= min_support:
+                frequent_bits[c] = bits
+                support_table[frozenset(items[r] for r in c)] = support
+        if not frequent_bits:
+            break
+        all_frequent_itemsets.extend(set(items[r] for r in c) for c in frequent_bits)
+        previous, frequent_bits = frequent_bits, {}
+        candidates = ((c, previous[c[:-1]] & item_bits[c[-1]]) for c in join_and_prune(previous))
+    if return_support:
+        return all_frequent_itemsets, support_table
     return all_frequent_itemsets
 
-def generate_rules(frequent_itemsets, transactions, min_confidence):
-    transactions = list(map(set, transactions))
+def generate_rules(frequent_itemsets, transactions, min_confidence, support_table=None):
+    """Association rules (antecedent, consequent, confidence).
+
+    Supports come from support_table (as returned by apriori(...,
+    return_support=True)). Anything missing is counted from transactions.
+    Consequents grow level by level from the ones that already met
+    min_confidence. Moving an item from the antecedent to the consequent can
+    only lower the confidence, so no other consequent can qualify.
+    """
+    support_table = dict(support_table or {})
+    encoded = []
+
+    def support(itemset):
+        if itemset not in support_table:
+            if not encoded:
+                encoded.append(encode_transactions(list(map(set, transactions))))
+            support_table.update(calculate_support(encoded[0], [itemset]))
+        return support_table[itemset]
+
     rules = []
     for itemset in frequent_itemsets:
-        if len(itemset) > 1:
-            for i in range(1, len(itemset)):
-                for antecedent in combinations(itemset, i):
-                    antecedent = set(antecedent)
-                    consequent = itemset - antecedent
-                    support_count_itemset = sum(1 for t in transactions if itemset.issubset(t)) / len(transactions)
-                    support_count_antecedent = sum(1 for t in transactions if antecedent.issubset(t)) / len(transactions)
-                    confidence = support_count_itemset / support_count_antecedent
-                    if confidence >= min_confidence:
-                        rules.append((antecedent, consequent, confidence))
+        if len(itemset) < 2:
+            continue
+        itemset = frozenset(itemset)
+        itemset_support = support(itemset)
+        items = sorted(itemset, key=repr)
+        consequents = [(i,) for i in range(len(items))]
+        while consequents and len(consequents[0]) < len(items):
+            confident = []
+            for c in consequents:
+                consequent = frozenset(items[i] for i in c)
+                antecedent = itemset - consequent
+                confidence = itemset_support / support(antecedent)
+                if confidence >= min_confidence:
+                    rules.append((set(antecedent), set(consequent), confidence))
+                    confident.append(c)
+            consequents = join_and_prune(confident)
     return rules
 
-frequent_itemsets = apriori(transactions, min_support)
-print("Frequent Itemsets:")
-for itemset in frequent_itemsets:
-    print(itemset)
+def random_baskets(n_transactions, n_items, avg_basket=10, seed=0):
+    """Synthetic retail baskets with a skewed (Zipf-like) item popularity."""
+    rng = random.Random(seed)
+    items = [f"item{i}" for i in range(n_items)]
+    weights = [1 / (rank + 1) for rank in range(n_items)]
+    return [
+        set(rng.choices(items, weights, k=max(1, int(rng.expovariate(1 / avg_basket)))))
+        for _ in range(n_transactions)
+    ]
+
+def benchmark_support_counting(n_transactions=100_000, n_items=1_000, n_candidates=2_000, scan_candidates=50, seed=0):
+    """Compare bitmap support counting with the per-transaction issubset scan.
+
+    The scan costs O(|T|) per candidate, so it is only timed on the first
+    scan_candidates candidates and reported per candidate.
+    """
+    transactions = random_baskets(n_transactions, n_items, seed=seed)
+    rng = random.Random(seed)
+    popular = [f"item{i}" for i in range(min(n_items, 200))]
+    candidates = [set(rng.sample(popular, 2)) for _ in range(n_candidates)]
+
+    start = time.perf_counter()
+    encoded = encode_transactions(transactions)
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bitmap_support = calculate_support(encoded, candidates)
+    bitmap_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for candidate in candidates[:scan_candidates]:
+        count = sum(1 for t in transactions if candidate.issubset(t)) / len(transactions)
+        assert abs(count - bitmap_support[frozenset(candidate)]) < 1e-12
+    scan_seconds = time.perf_counter() - start
+
+    scan_per_candidate = scan_seconds / min(scan_candidates, n_candidates)
+    bitmap_per_candidate = bitmap_seconds / n_candidates
+    print(f"{n_transactions} transactions, {n_items} items, {n_candidates} candidates")
+    print(f"Encoding transactions: {encode_seconds:.2f}s (once per apriori() call)")
+    print(f"Bitmap support:  {bitmap_per_candidate * 1e6:10.1f} us/candidate")
+    print(f"issubset scan:   {scan_per_candidate * 1e6:10.1f} us/candidate")
+    print(f"Speedup: {scan_per_candidate / bitmap_per_candidate:.0f}x")
+
+def benchmark_candidate_generation(n_transactions=20_000, n_items=500, supports=(0.05, 0.02, 0.01), seed=0):
+    """Candidates counted by apriori() per level vs. all k-combinations of frequent items.
+
+    The k-combinations count is what the previous create_candidates produced
+    (every k-combination of the items appearing in frequent (k-1)-itemsets).
+    """
+    transactions = random_baskets(n_transactions, n_items, seed=seed)
+    for min_support in supports:
+        start = time.perf_counter()
+        frequent = apriori(transactions, min_support)
+        seconds = time.perf_counter() - start
+
+        by_size = {}
+        for itemset in frequent:
+            by_size.setdefault(len(itemset), []).append(itemset)
+        joined = combos = 0
+        for k in range(2, max(by_size, default=1) + 2):
+            previous = by_size.get(k - 1, [])
+            joined += len(create_candidates(previous, k))
+            combos += math.comb(len({item for itemset in previous for item in itemset}), k)
+        print(f"min_support={min_support}: {len(frequent)} frequent itemsets in {seconds:.2f}s, "
+              f"{joined} joined+pruned candidates vs {combos} k-combinations")
+
+def benchmark_rule_generation(n_transactions=20_000, n_items=500, min_support=0.005, min_confidence=0.3, seed=0):
+    """Time apriori() against generate_rules() reusing its support table."""
+    transactions = random_baskets(n_transactions, n_items, seed=seed)
+
+    start = time.perf_counter()
+    frequent, support_table = apriori(transactions, min_support, return_support=True)
+    apriori_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rules = generate_rules(frequent, transactions, min_confidence, support_table)
+    rules_seconds = time.perf_counter() - start
+
+    print(f"apriori(): {len(frequent)} itemsets in {apriori_seconds:.2f}s")
+    print(f"generate_rules(): {len(rules)} rules in {rules_seconds:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apriori frequent itemsets and association rules")
+    parser.add_argument("--benchmark", action="store_true", help="Time support counting on a synthetic retail dataset")
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=1_000)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_support_counting(args.transactions, args.items)
+        print()
+        benchmark_candidate_generation()
+        print()
+        benchmark_rule_generation()
+    else:
+        frequent_itemsets, support_table = apriori(transactions, min_support, return_support=True)
+        print("Frequent Itemsets:")
+        for itemset in frequent_itemsets:
+            print(itemset)
 
-rules = generate_rules(frequent_itemsets, transactions, min_confidence)
-print("\nAssociation Rules:")
-for antecedent, consequent, confidence in rules:
-    print(f"{set(antecedent)} -> {set(consequent)} (Confidence: {confidence:.2f})")
+        rules = generate_rules(frequent_itemsets, transactions, min_confidence, support_table)
+        print("\nAssociation Rules:")
+        for antecedent, consequent, confidence in rules:
+            print(f"{set(antecedent)} -> {set(consequent)} (Confidence: {confidence:.2f})")
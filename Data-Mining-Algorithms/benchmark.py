@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+from apriori_algorithm import apriori, generate_rules, random_baskets
+from fp_growth import fp_growth
+from knn import KNN
+
+
+def best_time(fn, repeat):
+    """Best wall-clock time of repeat calls, plus the last call's result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def random_points(n_points, n_features, n_classes=3, seed=0):
+    """Gaussian blobs, one per class, so KNN has real structure to find."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=3.0, size=(n_classes, n_features))
+    y = rng.integers(0, n_classes, n_points)
+    return centers[y] + rng.normal(size=(n_points, n_features)), y
+
+
+def benchmark_association(sizes, n_items, min_support, min_confidence, repeat=1, seed=0):
+    results = []
+    for n in sizes:
+        transactions = random_baskets(n, n_items, seed=seed)
+        apriori_seconds, (itemsets, support_table) = best_time(
+            lambda: apriori(transactions, min_support, return_support=True), repeat
+        )
+        fp_seconds, _ = best_time(lambda: fp_growth(transactions, min_support), repeat)
+        rules_seconds, rules = best_time(
+            lambda: generate_rules(itemsets, transactions, min_confidence, support_table), repeat
+        )
+        results.append({
+            "transactions": n,
+            "items": n_items,
+            "frequent_itemsets": len(itemsets),
+            "rules": len(rules),
+            "apriori_seconds": apriori_seconds,
+            "fp_growth_seconds": fp_seconds,
+            "generate_rules_seconds": rules_seconds,
+        })
+        print(f"baskets={n:>8}: apriori {apriori_seconds:.3f}s, fp_growth {fp_seconds:.3f}s, "
+              f"generate_rules {rules_seconds:.3f}s ({len(itemsets)} itemsets, {len(rules)} rules)")
+    return results
+
+
+def benchmark_knn(sizes, n_features, n_queries, k, algorithm, repeat=1, seed=0):
+    results = []
+    for n in sizes:
+        # One draw so the held-out queries come from the same class centres
+        points, labels = random_points(n + n_queries, n_features, seed=seed)
+        X, y, queries, query_labels = points[:n], labels[:n], points[n:], labels[n:]
+        model = KNN(k=k, algorithm=algorithm)
+        fit_seconds, _ = best_time(lambda: model.fit(X, y), repeat)
+        predict_seconds, predictions = best_time(lambda: model.predict(queries), repeat)
+        results.append({
+            "train_points": n,
+            "features": n_features,
+            "queries": n_queries,
+            "k": k,
+            "algorithm": algorithm,
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+            "queries_per_second": n_queries / predict_seconds if predict_seconds else float("inf"),
+            "accuracy": float(np.mean(predictions == query_labels)),
+        })
+        print(f"points={n:>9}: fit {fit_seconds:.3f}s, predict {predict_seconds:.3f}s "
+              f"({n_queries / predict_seconds:.0f} queries/s)")
+    return results
+
+
+def parse_sizes(text):
+    return [int(size) for size in text.split(",") if size.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the data mining algorithms")
+    parser.add_argument("--basket-sizes", type=parse_sizes, default=[1_000, 10_000, 100_000],
+                        help="Comma-separated transaction counts")
+    parser.add_argument("--items", type=int, default=1_000)
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--point-sizes", type=parse_sizes, default=[1_000, 10_000, 100_000],
+                        help="Comma-separated training set sizes for KNN")
+    parser.add_argument("--features", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--algorithm", choices=tuple(KNN.ALGORITHMS), default="brute")
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of this many runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "association": benchmark_association(args.basket_sizes, args.items, args.min_support,
+                                              args.min_confidence, args.repeat, args.seed),
+        "knn": benchmark_knn(args.point_sizes, args.features, args.queries, args.k,
+                             args.algorithm, args.repeat, args.seed),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,137 @@
+import argparse
+import math
+import time
+
+from apriori_algorithm import apriori, random_baskets
+
+transactions = [
+    ['milk', 'bread', 'butter'],
+    ['beer', 'bread'],
+    ['milk', 'bread', 'butter', 'beer'],
+    ['bread', 'butter'],
+    ['milk', 'bread', 'beer']
+]
+
+min_support = 0.6
+
+
+class FPNode:
+    __slots__ = ("item", "count", "parent", "children")
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+
+def build_tree(weighted_transactions, min_count):
+    """Build an FP-tree from (items, count) pairs in two passes.
+
+    The first pass counts items and the second inserts every transaction's
+    frequent items, most frequent first, so common prefixes share nodes.
+    Returns the root and a header table mapping each frequent item to its
+    nodes, or (None, {}) if nothing is frequent.
+    """
+    counts = {}
+    for items, count in weighted_transactions:
+        for item in items:
+            counts[item] = counts.get(item, 0) + count
+    frequent = {item: c for item, c in counts.items() if c >= min_count}
+    if not frequent:
+        return None, {}
+
+    order = {item: rank for rank, item in enumerate(sorted(frequent, key=lambda i: -frequent[i]))}
+    root = FPNode(None, None)
+    header = {item: [] for item in order}
+    for items, count in weighted_transactions:
+        node = root
+        for item in sorted((i for i in items if i in order), key=order.__getitem__):
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = FPNode(item, node)
+                header[item].append(child)
+            child.count += count
+            node = child
+    return root, header
+
+
+def mine_tree(header, min_count, suffix, results):
+    # Least frequent items first; each one's conditional pattern base is the
+    # set of prefix paths leading to its nodes, weighted by the node counts.
+    for item in sorted(header, key=lambda i: sum(n.count for n in header[i])):
+        nodes = header[item]
+        itemset = suffix | {item}
+        results[frozenset(itemset)] = sum(node.count for node in nodes)
+
+        pattern_base = []
+        for node in nodes:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                pattern_base.append((path, node.count))
+        _, conditional_header = build_tree(pattern_base, min_count)
+        if conditional_header:
+            mine_tree(conditional_header, min_count, itemset, results)
+
+
+def fp_growth(transactions, min_support, return_support=False):
+    """Frequent itemsets as a list of sets, like apriori().
+
+    With return_support=True, also returns {frozenset(itemset): support}.
+    """
+    transactions = list(map(set, transactions))
+    n = len(transactions)
+    if not n:
+        return ([], {}) if return_support else []
+    # Smallest count with count / n >= min_support, so the float comparison
+    # matches apriori() exactly.
+    min_count = max(1, math.ceil(min_support * n))
+    while min_count > 1 and (min_count - 1) / n >= min_support:
+        min_count -= 1
+    while min_count / n < min_support:
+        min_count += 1
+
+    _, header = build_tree([(t, 1) for t in transactions], min_count)
+    results = {}
+    mine_tree(header, min_count, frozenset(), results)
+    itemsets = [set(itemset) for itemset in results]
+    if return_support:
+        return itemsets, {itemset: count / n for itemset, count in results.items()}
+    return itemsets
+
+
+def benchmark(n_transactions=20_000, n_items=500, supports=(0.05, 0.02, 0.01, 0.005), seed=0):
+    """Time fp_growth() against apriori() on the same synthetic baskets."""
+    baskets = random_baskets(n_transactions, n_items, seed=seed)
+    print(f"{n_transactions} transactions, {n_items} items")
+    print(f"{'min_support':>12}{'itemsets':>10}{'apriori (s)':>13}{'fp_growth (s)':>15}")
+    for support in supports:
+        start = time.perf_counter()
+        expected = apriori(baskets, support)
+        apriori_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = fp_growth(baskets, support)
+        fp_seconds = time.perf_counter() - start
+
+        assert {frozenset(s) for s in found} == {frozenset(s) for s in expected}
+        print(f"{support:>12}{len(found):>10}{apriori_seconds:>13.2f}{fp_seconds:>15.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FP-Growth frequent itemset mining")
+    parser.add_argument("--benchmark", action="store_true", help="Compare with apriori() across support thresholds")
+    parser.add_argument("--transactions", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.transactions, args.items)
+    else:
+        print("Frequent Itemsets:")
+        for itemset in fp_growth(transactions, min_support):
+            print(itemset)
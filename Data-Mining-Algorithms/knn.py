@@ -1,48 +1,225 @@
+import argparse
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from collections import Counter
 from sklearn.datasets import load_iris
+from sklearn.neighbors import BallTree, KDTree
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
 
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _predict_shard(X):
+    return _worker_model._predict_serial(X)
+
+
 class KNN:
-    def __init__(self, k=5):
+    ALGORITHMS = {"brute": None, "kd_tree": KDTree, "ball_tree": BallTree}
+
+    def __init__(self, k=5, chunk_size=1024, algorithm="brute", leaf_size=40, n_jobs=1):
+        """chunk_size caps how many queries share one distance matrix
+        (chunk_size x n_train floats), trading memory for speed.
+
+        algorithm="kd_tree" or "ball_tree" builds a spatial index in fit()
+        so each query only visits nearby leaves instead of every training
+        sample. This pays off on low-dimensional data with many points.
+
+        n_jobs > 1 (or -1 for all cores) shards predict() across a process
+        pool. If the training data is memory-mapped, the workers map the
+        same file, so the OS page cache holds a single copy.
+        """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {', '.join(self.ALGORITHMS)}")
         self.k = k
+        self.chunk_size = chunk_size
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.n_jobs = n_jobs
+        self._pool = None
 
     def fit(self, X, y):
-        """Store training data"""
-        self.X_train = X
-        self.y_train = y
+        """Store training data
+
+        X and y may be arrays or paths to .npy files. Paths are opened with
+        mmap_mode="r", and floating-point arrays (including np.memmap) are
+        used as is, so large training sets are never copied into RAM.
+        """
+        if isinstance(X, (str, os.PathLike)):
+            X = np.load(X, mmap_mode="r")
+        if isinstance(y, (str, os.PathLike)):
+            y = np.load(y, mmap_mode="r")
+        X = np.asanyarray(X)
+        self.X_train = X if np.issubdtype(X.dtype, np.floating) else X.astype(float)
+        self.y_train = np.asanyarray(y)
+        self.close()  # workers of an earlier fit hold the old training set
+        self._prepare()
+
+    def _prepare(self):
+        """Derive the label codes, squared norms and index from X_train / y_train"""
+        self.classes_, self._y_codes = np.unique(self.y_train, return_inverse=True)
+        if np.issubdtype(self.y_train.dtype, np.integer) and np.array_equal(self.classes_, np.arange(len(self.classes_))):
+            self._y_codes = self.y_train  # labels are already 0..n_classes-1 (and stay memory-mapped)
+        index = self.ALGORITHMS[self.algorithm]
+        self._train_sq_norms = None
+        if not index:
+            self._train_sq_norms = np.empty(len(self.X_train), dtype=self.X_train.dtype)
+            for start in range(0, len(self.X_train), self.chunk_size * 64):
+                part = self.X_train[start:start + self.chunk_size * 64]
+                self._train_sq_norms[start:start + len(part)] = np.einsum("ij,ij->i", part, part)
+        self._tree = index(self.X_train, leaf_size=self.leaf_size) if index else None
 
     def predict(self, X):
-        """Predict labels for given data"""
-        predictions = [self._predict(x) for x in X]
-        return np.array(predictions)
+        """Predict labels for given data, chunk_size samples at a time"""
+        # Queries take the training dtype so the matmul never upcasts
+        # (and thereby copies) a float32 training matrix.
+        X = np.asarray(X, dtype=self.X_train.dtype)
+        n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        if not n_jobs or n_jobs <= 1 or len(X) <= self.chunk_size:
+            return self._predict_serial(X)
+        shards = [X[start:start + self.chunk_size] for start in range(0, len(X), self.chunk_size)]
+        # The pool is kept across calls: starting it reopens the mapped files
+        # and rebuilds any tree in every worker.
+        if self._pool is None or self._pool_size != n_jobs:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(self,))
+            self._pool_size = n_jobs
+        return np.concatenate(list(self._pool.map(_predict_shard, shards)))
+
+    def close(self):
+        """Shut down the predict() worker pool (it is restarted when needed)"""
+        if getattr(self, "_pool", None) is not None:
+            self._pool.shutdown()
+        self._pool = None
+
+    def _predict_serial(self, X):
+        predictions = np.empty(len(X), dtype=self.classes_.dtype)
+        for start in range(0, len(X), self.chunk_size):
+            stop = start + self.chunk_size
+            predictions[start:stop] = self._predict_batch(X[start:stop])
+        return predictions
+
+    def __getstate__(self):
+        # Workers get the memory-mapped files' locations instead of pickled
+        # copies of their contents and reopen them in __setstate__. Everything
+        # derived from them (label codes, norms, a spatial index, each O(n))
+        # is rebuilt there rather than pickled.
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        mapped = False
+        for name in ("X_train", "y_train"):
+            A = state.get(name)
+            if isinstance(A, np.memmap) and isinstance(A.base, mmap.mmap) and A.filename:
+                order = "F" if A.flags.f_contiguous and not A.flags.c_contiguous else "C"
+                state[name] = ("memmap", A.filename, A.dtype.str, A.offset, A.shape, order)
+                mapped = True
+        if mapped:
+            for name in ("classes_", "_y_codes", "_train_sq_norms", "_tree"):
+                state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        for name in ("X_train", "y_train"):
+            A = state.get(name)
+            if isinstance(A, tuple) and A[0] == "memmap":
+                _, filename, dtype, offset, shape, order = A
+                state[name] = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape, order=order)
+        self.__dict__.update(state)
+        if "_y_codes" not in state and "X_train" in state:
+            self._prepare()
 
     def _predict(self, x):
         """Predict label for one sample"""
-        distances = np.linalg.norm(self.X_train - x, axis=1)
+        return self._predict_batch(np.asarray(x, dtype=self.X_train.dtype)[None, :])[0]
+
+    def _kneighbors(self, X):
+        """Indices of the k nearest training samples per row, nearest first"""
+        if self._tree is not None:
+            return self._tree.query(X, k=min(self.k, len(self.X_train)), return_distance=False)
+
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab for the whole chunk in one matmul
+        # (built in place, so the chunk needs a single chunk_size x n_train buffer)
+        distances = X @ self.X_train.T
+        distances *= -2.0
+        distances += np.einsum("ij,ij->i", X, X)[:, None]
+        distances += self._train_sq_norms[None, :]
+        np.maximum(distances, 0, out=distances)
+
+        k = min(self.k, distances.shape[1])
+        k_indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(distances, k_indices, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(k_indices, order, axis=1)
 
-        k_indices = np.argsort(distances)[:self.k]
+    def _predict_batch(self, X):
+        """Majority vote over the k nearest labels for a chunk of samples"""
+        k_nearest = self._y_codes[self._kneighbors(X)]
+        n, k = k_nearest.shape
+        rows = np.arange(n)[:, None]
 
-        k_nearest_labels = self.y_train[k_indices]
+        votes = np.zeros((n, len(self.classes_)), dtype=np.int64)
+        np.add.at(votes, (rows, k_nearest), 1)
 
-        most_common = Counter(k_nearest_labels).most_common(1)
-        return most_common[0][0]
+        # Ties go to the label seen first among the nearest neighbours, as
+        # Counter.most_common did: rank of each label's first appearance.
+        first_seen = np.full(votes.shape, k, dtype=np.int64)
+        for j in range(k - 1, -1, -1):
+            first_seen[rows[:, 0], k_nearest[:, j]] = j
+
+        return self.classes_[np.argmax(votes * (k + 1) - first_seen, axis=1)]
+
+
+def benchmark_algorithms(n_train=200_000, n_queries=2_000, dims=(2, 3, 5, 8, 12, 16, 32), k=5, seed=0):
+    """Time fit + predict for each algorithm as dimensionality grows.
+
+    Tree indexes prune most of the training set in a few dimensions, but
+    their pruning stops working as dimensions are added. The printed table
+    shows where brute force starts winning.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{n_train} training points, {n_queries} queries, k={k}")
+    print(f"{'dims':>5}" + "".join(f"{name:>12}" for name in KNN.ALGORITHMS) + "   fastest")
+    for d in dims:
+        X = rng.random((n_train, d))
+        y = rng.integers(0, 3, n_train)
+        queries = rng.random((n_queries, d))
+        seconds = {}
+        for name in KNN.ALGORITHMS:
+            model = KNN(k=k, algorithm=name)
+            start = time.perf_counter()
+            model.fit(X, y)
+            model.predict(queries)
+            seconds[name] = time.perf_counter() - start
+        print(f"{d:>5}" + "".join(f"{seconds[name]:>11.2f}s" for name in seconds)
+              + f"   {min(seconds, key=seconds.get)}")
 
 
 if __name__ == "__main__":
-    iris = load_iris()
-    X, y = iris.data, iris.target
+    parser = argparse.ArgumentParser(description="K-Nearest Neighbors example")
+    parser.add_argument("--algorithm", choices=tuple(KNN.ALGORITHMS), default="brute")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare brute force with the tree indexes as dimensionality grows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_algorithms()
+    else:
+        iris = load_iris()
+        X, y = iris.data, iris.target
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
 
-    model = KNN(k=5)
-    model.fit(X_train, y_train)
+        model = KNN(k=5, algorithm=args.algorithm)
+        model.fit(X_train, y_train)
 
-    predictions = model.predict(X_test)
+        predictions = model.predict(X_test)
 
-    acc = accuracy_score(y_test, predictions)
-    print(f"KNN Accuracy: {acc:.2f}")
+        acc = accuracy_score(y_test, predictions)
+        print(f"KNN Accuracy: {acc:.2f}")
@@ -0,0 +1,154 @@
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from apriori_algorithm import apriori, encode_transactions, generate_rules, popcount
+
+
+def read_baskets(path, fmt="lines", delimiter=",", chunk_size=100_000):
+    """Stream baskets from a file, chunk_size baskets at a time.
+
+    fmt="lines": one basket per line, items separated by delimiter.
+    fmt="long":  CSV rows of transaction_id,item. Rows of one transaction
+                 must be consecutive, and a header row is skipped if present.
+    """
+    with open(path, newline="") as f:
+        rows = csv.reader(f, delimiter=delimiter)
+        if fmt == "lines":
+            baskets = ([item.strip() for item in row if item.strip()] for row in rows)
+        elif fmt == "long":
+            baskets = _group_long_rows(rows)
+        else:
+            raise ValueError(f"Unknown format {fmt!r}; expected 'lines' or 'long'")
+        while True:
+            chunk = list(islice(baskets, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _group_long_rows(rows):
+    current_id, basket = None, []
+    for i, row in enumerate(rows):
+        if len(row) < 2:
+            continue
+        if i == 0 and row[0].strip().lower() in ("transaction", "transaction_id", "tid", "id"):
+            continue
+        tid, item = row[0].strip(), row[1].strip()
+        if tid != current_id and basket:
+            yield basket
+            basket = []
+        current_id = tid
+        basket.append(item)
+    if basket:
+        yield basket
+
+
+def _partitions(chunks, chunk_size):
+    # A very small final partition makes almost every itemset in it locally
+    # frequent, so it is merged into the previous partition instead.
+    previous = None
+    for chunk in chunks:
+        if previous is not None:
+            if len(chunk) < chunk_size // 2:
+                chunk = previous + chunk
+            else:
+                yield previous
+        previous = chunk
+    if previous is not None:
+        yield previous
+
+
+def _local_frequent(baskets, min_support):
+    return len(baskets), [frozenset(itemset) for itemset in apriori(baskets, min_support)]
+
+
+_candidates = None
+
+def _set_candidates(candidates):
+    global _candidates
+    _candidates = candidates
+
+def _count_candidates(baskets):
+    item_bits, _ = encode_transactions(list(map(set, baskets)))
+    counts = {}
+    for candidate in _candidates:
+        bits = -1
+        for item in candidate:
+            bits &= item_bits.get(item, 0)
+        counts[candidate] = popcount(bits)
+    return counts
+
+
+def _bounded_map(pool, fn, iterable, max_pending):
+    # Like pool.map, but keeps at most max_pending partitions in flight so
+    # the whole file is never held in memory at once.
+    pending = []
+    for args in iterable:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= max_pending:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def son(path, min_support, chunk_size=100_000, workers=None, fmt="lines", delimiter=",", return_support=False):
+    """Frequent itemsets of a basket file too big for memory (SON algorithm).
+
+    Pass 1 mines every partition locally with apriori() at the same relative
+    min_support. Any itemset that is frequent overall must be frequent in at
+    least one partition, so the union of the local results is a complete
+    candidate set. Pass 2 streams the file again and counts every candidate's
+    global support.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+
+    candidates = set()
+    n = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partitions = _partitions(read_baskets(path, fmt, delimiter, chunk_size), chunk_size)
+        for size, local in _bounded_map(pool, _local_frequent, ((p, min_support) for p in partitions), max_pending):
+            n += size
+            candidates.update(local)
+
+    totals = dict.fromkeys(candidates, 0)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_candidates, initargs=(list(candidates),)) as pool:
+        partitions = read_baskets(path, fmt, delimiter, chunk_size)
+        for counts in _bounded_map(pool, _count_candidates, ((p,) for p in partitions), max_pending):
+            for candidate, count in counts.items():
+                totals[candidate] += count
+
+    support_table = {itemset: count / n for itemset, count in totals.items() if n and count / n >= min_support}
+    itemsets = [set(itemset) for itemset in support_table]
+    if return_support:
+        return itemsets, support_table
+    return itemsets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitioned (SON) frequent itemset mining for large basket files")
+    parser.add_argument("path", help="Basket file")
+    parser.add_argument("--format", choices=("lines", "long"), default="lines",
+                        help="lines: one basket per line; long: transaction_id,item rows")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--min-confidence", type=float, default=None, help="Also print association rules")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Baskets per partition")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    frequent_itemsets, support_table = son(args.path, args.min_support, args.chunk_size, args.workers,
+                                           args.format, args.delimiter, return_support=True)
+    print(f"Frequent Itemsets ({len(frequent_itemsets)}):")
+    for itemset in sorted(frequent_itemsets, key=lambda s: (len(s), sorted(s))):
+        print(f"{itemset} (Support: {support_table[frozenset(itemset)]:.4f})")
+
+    if args.min_confidence is not None:
+        # Every subset of a frequent itemset is frequent, so the table is complete.
+        rules = generate_rules(frequent_itemsets, None, args.min_confidence, support_table)
+        print("\nAssociation Rules:")
+        for antecedent, consequent, confidence in rules:
+            print(f"{set(antecedent)} -> {set(consequent)} (Confidence: {confidence:.2f})")
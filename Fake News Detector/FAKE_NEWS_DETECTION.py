@@ -8,11 +8,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
-import string
-import re
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 from sklearn.metrics import classification_report
+from fake_news_utils import wordopt, output_lable, save_bundle
 
 
 # In[9]:
@@ -141,20 +140,6 @@ data.columns
 data.head()
 
 
-# In[49]:
-
-
-def wordopt(text):
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'\W', ' ', text)
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    text = re.sub(r'<.*?>+', '', text)
-    text = re.sub(r'[%s]' % re.escape(string.punctuation), '', text)
-    text = re.sub(r'\w*\d\w*', '', text)
-    return text
-
-
 # In[51]:
 
 
@@ -299,10 +284,11 @@ print (classification_report(y_test, pred_rf))
 # In[94]:
 
 
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.metrics import classification_report
+from approximate_knn import ApproximateKNeighborsClassifier
 
-KNN = KNeighborsClassifier(n_neighbors=5)
+# LSH index over SVD-reduced TF-IDF rows instead of brute-force
+# KNeighborsClassifier(n_neighbors=5); see approximate_knn.py for recall/speedup.
+KNN = ApproximateKNeighborsClassifier(n_neighbors=5)
 KNN.fit(xv_train, y_train)
 
 
@@ -324,14 +310,15 @@ KNN.score(xv_test, y_test)
 print(classification_report(y_test, pred_knn))
 
 
-# In[102]:
+# In[100]:
+
+
+# Saved for serve.py, which loads the models once instead of retraining.
+save_bundle(vectorization, {"LR": LR, "DT": DT, "GB": GB, "RF": RF, "KNN": KNN})
 
 
-def output_lable(n):
-    if n == 0:
-        return "Fake News"
-    elif n == 1:
-        return "Not A Fake News"
+# In[102]:
+
 
 def manual_testing(news):
     testing_news = {"text": [news]}
@@ -0,0 +1,241 @@
+"""
+Fake News Detector - approximate nearest-neighbour classifier
+
+KNeighborsClassifier on the sparse TF-IDF matrix compares every query with
+every training article (O(N*V) per prediction). ApproximateKNeighborsClassifier
+instead:
+
+    1. projects the TF-IDF rows onto a few hundred dimensions with TruncatedSVD
+    2. centres the projected rows on the training mean and hashes them into
+       several random-hyperplane LSH tables
+    3. at query time shortlists the rows that share a bucket with the query
+       and re-ranks the shortlist with the exact TF-IDF cosine similarity
+
+The index is built once in fit() and pickles with the rest of the model
+bundle. Run this file directly to measure its recall against exact KNN and
+the query speedup:
+
+    python approximate_knn.py --fake Fake.csv --true True.csv --queries 2000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+
+class ApproximateKNeighborsClassifier:
+    """Drop-in replacement for KNeighborsClassifier(n_neighbors=k) on TF-IDF.
+
+    Parameters
+    ----------
+    n_neighbors : votes per prediction, as in KNeighborsClassifier
+    n_components : SVD dimensions kept for the index
+    n_tables : number of independent LSH tables (more tables -> better recall)
+    n_bits : hyperplanes per table (more bits -> smaller buckets, faster queries)
+    n_rerank : bucket-mates per query re-scored with the exact TF-IDF cosine
+    """
+
+    # Queries per kneighbors chunk are chosen so the (chunk, n_rows) candidate
+    # mask and the (chunk, n_features) dense query block stay near this size.
+    chunk_cells = 1 << 22
+
+    def __init__(self, n_neighbors=5, n_components=256, n_tables=30, n_bits=9, n_rerank=64, random_state=0):
+        if n_bits > 62:
+            raise ValueError("n_bits must be at most 62")
+        self.n_neighbors = n_neighbors
+        self.n_components = n_components
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_rerank = n_rerank
+        self.random_state = random_state
+
+    def _project(self, X):
+        return normalize(self.svd_.transform(X)).astype(np.float32)
+
+    def _hash(self, Z):
+        # (n_tables, n_rows) integer bucket codes, one bit per hyperplane.
+        # TF-IDF rows share a large common component, so without centring
+        # most rows fall on the same side of every hyperplane.
+        # Indexes pickled before centring was added have no mean_.
+        bits = np.einsum("tbd,nd->tnb", self.planes_, Z - getattr(self, "mean_", 0)) > 0
+        return bits.astype(np.int64) @ self._bit_weights
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        self.classes_, self._y = np.unique(y, return_inverse=True)
+        n_components = max(1, min(self.n_components, X.shape[1] - 1, X.shape[0] - 1))
+        self.svd_ = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+        self.svd_.fit(X)
+        self._Z = self._project(X)
+        self.mean_ = self._Z.mean(axis=0)
+        self._X = normalize(X.tocsr(), copy=True)
+
+        rng = np.random.default_rng(self.random_state)
+        self.planes_ = rng.standard_normal((self.n_tables, self.n_bits, n_components)).astype(np.float32)
+        self._bit_weights = 1 << np.arange(self.n_bits, dtype=np.int64)
+
+        # Each table is stored as the row ids sorted by bucket code plus the
+        # start offset of every distinct code, so a lookup is a searchsorted.
+        self._tables = []
+        for codes in self._hash(self._Z):
+            order = np.argsort(codes, kind="stable")
+            keys, starts = np.unique(codes[order], return_index=True)
+            self._tables.append((keys, np.append(starts, len(order)), order))
+        return self
+
+    def _candidates(self, codes):
+        """Boolean (n_queries, n_rows) mask of every query's bucket-mates.
+
+        codes is (n_tables, n_queries); each table marks the whole bucket of
+        every query with one repeat/arange gather, and rows found by several
+        tables collapse in the mask.
+        """
+        n_queries = codes.shape[1]
+        mask = np.zeros((n_queries, self._Z.shape[0]), dtype=bool)
+        for (keys, bounds, order), table_codes in zip(self._tables, codes):
+            pos = np.minimum(np.searchsorted(keys, table_codes), len(keys) - 1)
+            starts = bounds[pos]
+            lengths = np.where(keys[pos] == table_codes, bounds[pos + 1] - starts, 0)
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            mask[np.repeat(np.arange(n_queries), lengths), order[np.repeat(starts, lengths) + offsets]] = True
+        return mask
+
+    @staticmethod
+    def _top_per_query(query_ids, row_ids, scores, n_queries, limit):
+        """The `limit` best-scoring row ids of every query, best first.
+
+        query_ids must be sorted and every query must have at least `limit`
+        pairs. The pairs are scattered into a padded (n_queries, width) table
+        so one argpartition along axis 1 ranks all queries at once.
+        """
+        counts = np.bincount(query_ids, minlength=n_queries)
+        limit = min(limit, counts.min())
+        cols = np.arange(len(query_ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+        padded = np.full((n_queries, counts.max()), -np.inf)
+        padded[query_ids, cols] = scores
+        ids = np.zeros(padded.shape, dtype=np.int64)
+        ids[query_ids, cols] = row_ids
+        top = np.argpartition(-padded, limit - 1, axis=1)[:, :limit]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(padded, top, axis=1), axis=1), axis=1)
+        return np.take_along_axis(ids, top, axis=1)
+
+    def _exact_similarity(self, X, query_ids, row_ids):
+        """TF-IDF cosine of each (query, training row) pair.
+
+        The training rows are gathered once; each of their non-zeros is
+        multiplied with the matching entry of the densified query chunk and
+        the products are summed per row (empty rows sum to 0).
+        """
+        dense = X.toarray()
+        rows = self._X[row_ids]
+        lengths = np.diff(rows.indptr)
+        flat = np.repeat(query_ids * dense.shape[1], lengths) + rows.indices
+        owner = np.repeat(np.arange(len(row_ids)), lengths)
+        return np.bincount(owner, weights=rows.data * dense.ravel()[flat], minlength=len(row_ids))
+
+    def kneighbors(self, X, n_neighbors=None):
+        """Indices of the approximate nearest training rows, closest first."""
+        k = min(n_neighbors or self.n_neighbors, self._Z.shape[0])
+        X = normalize(X.tocsr())
+        chunk = max(1, self.chunk_cells // max(self._Z.shape[0], X.shape[1]))
+        neighbors = np.empty((X.shape[0], k), dtype=np.int64)
+        for start in range(0, X.shape[0], chunk):
+            neighbors[start:start + chunk] = self._kneighbors_chunk(X[start:start + chunk], k)
+        return neighbors
+
+    def _kneighbors_chunk(self, X, k):
+        n_queries = X.shape[0]
+        Z = self._project(X)
+        mask = self._candidates(self._hash(Z))
+        # Too few bucket-mates: fall back to scanning every training row.
+        mask[mask.sum(axis=1) < k] = True
+
+        # Shortlist each query's bucket-mates by cosine in the SVD space, then
+        # re-rank the shortlist on the exact TF-IDF rows.
+        query_ids, row_ids = np.nonzero(mask)
+        bounds = np.searchsorted(query_ids, np.arange(n_queries + 1))
+        sims = np.empty(len(row_ids), dtype=np.float32)
+        for i, z in enumerate(Z):  # one BLAS matvec per query beats gathering z for every pair
+            sims[bounds[i]:bounds[i + 1]] = self._Z[row_ids[bounds[i]:bounds[i + 1]]] @ z
+        shortlist = self._top_per_query(query_ids, row_ids, sims, n_queries, max(k, self.n_rerank))
+        query_ids = np.repeat(np.arange(n_queries), shortlist.shape[1])
+        exact = self._exact_similarity(X, query_ids, shortlist.ravel())
+        return self._top_per_query(query_ids, shortlist.ravel(), exact, n_queries, k)
+
+    def predict(self, X):
+        labels = self._y[self.kneighbors(X)]
+        votes = np.apply_along_axis(np.bincount, 1, labels, minlength=len(self.classes_))
+        return self.classes_[votes.argmax(axis=1)]
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+
+def compare_with_exact(approx, X_train, y_train, X_query, n_neighbors=5):
+    """Recall@k of approx against brute-force KNN, and the query speedup."""
+    from sklearn.neighbors import KNeighborsClassifier
+
+    exact = KNeighborsClassifier(n_neighbors=n_neighbors).fit(X_train, y_train)
+
+    started = time.perf_counter()
+    exact_pred = exact.predict(X_query)
+    exact_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    approx_pred = approx.predict(X_query)
+    approx_seconds = time.perf_counter() - started
+
+    exact_neighbors = exact.kneighbors(X_query, return_distance=False)
+    approx_neighbors = approx.kneighbors(X_query, n_neighbors)
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx_neighbors, exact_neighbors))
+    return {
+        "recall_at_k": hits / exact_neighbors.size,
+        "prediction_agreement": float(np.mean(approx_pred == exact_pred)),
+        "exact_seconds": exact_seconds,
+        "approx_seconds": approx_seconds,
+        "speedup": exact_seconds / approx_seconds if approx_seconds else float("inf"),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure approximate KNN recall and speedup against exact KNN")
+    parser.add_argument("--fake", default="Fake.csv")
+    parser.add_argument("--true", default="True.csv")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of test rows to query")
+    parser.add_argument("--neighbors", type=int, default=5)
+    parser.add_argument("--components", type=int, default=256)
+    parser.add_argument("--tables", type=int, default=30)
+    parser.add_argument("--bits", type=int, default=9)
+    parser.add_argument("--rerank", type=int, default=64)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+
+    from fake_news_utils import load_articles
+
+    args = parse_args()
+    x, y = load_articles(args.fake, args.true)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.25, random_state=0)
+    vectorization = TfidfVectorizer()
+    xv_train = vectorization.fit_transform(x_train)
+    xv_test = vectorization.transform(x_test.iloc[:args.queries])
+
+    started = time.perf_counter()
+    ann = ApproximateKNeighborsClassifier(
+        n_neighbors=args.neighbors, n_components=args.components, n_tables=args.tables, n_bits=args.bits,
+        n_rerank=args.rerank,
+    ).fit(xv_train, y_train)
+    print(f"Index built in {time.perf_counter() - started:.1f}s for {xv_train.shape[0]} articles")
+
+    report = compare_with_exact(ann, xv_train, y_train, xv_test, args.neighbors)
+    print(f"Recall@{args.neighbors}: {report['recall_at_k']:.3f}")
+    print(f"Prediction agreement with exact KNN: {report['prediction_agreement']:.3f}")
+    print(f"Exact: {report['exact_seconds']:.2f}s  Approximate: {report['approx_seconds']:.2f}s  "
+          f"Speedup: {report['speedup']:.1f}x")
+    print(f"Approximate accuracy: {ann.score(xv_test, y_test.iloc[:args.queries]):.4f}")
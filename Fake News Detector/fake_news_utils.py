@@ -0,0 +1,122 @@
+"""
+Shared helpers for the fake news detector.
+
+The notebook export (FAKE_NEWS_DETECTION.py) runs its whole training flow at
+import time, so anything another script needs (text cleaning, label names and
+saving/loading the trained models) lives here instead.
+"""
+
+import re
+import string
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+DEFAULT_BUNDLE_PATH = "fake_news_models.joblib"
+
+
+def wordopt(text):
+    text = text.lower()
+    text = re.sub(r'\[.*?\]', '', text)
+    text = re.sub(r'\W', ' ', text)
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = re.sub(r'<.*?>+', '', text)
+    text = re.sub(r'[%s]' % re.escape(string.punctuation), '', text)
+    text = re.sub(r'\w*\d\w*', '', text)
+    return text
+
+
+def output_lable(n):
+    if n == 0:
+        return "Fake News"
+    elif n == 1:
+        return "Not A Fake News"
+
+
+def read_articles(fake_path="Fake.csv", true_path="True.csv", random_state=None):
+    """Read both CSVs into one shuffled frame of raw text and class (fake=0, true=1)."""
+    data_fake = pd.read_csv(fake_path)
+    data_true = pd.read_csv(true_path)
+    data_fake["class"] = 0
+    data_true["class"] = 1
+    data = pd.concat([data_fake, data_true], axis=0)[["text", "class"]]
+    data = data.sample(frac=1, random_state=random_state).reset_index(drop=True)
+    data["text"] = data["text"].fillna("").astype(str)
+    return data
+
+
+def load_articles(fake_path="Fake.csv", true_path="True.csv", random_state=None):
+    """Read both CSVs, label them (fake=0, true=1) and clean the text.
+
+    Returns the cleaned texts and labels as two aligned Series in shuffled
+    order; pass random_state for a reproducible shuffle. Unlike
+    FAKE_NEWS_DETECTION.py, every row is kept (the notebook holds back the
+    last 10 rows of each CSV for manual testing), so the rows and their order
+    differ from the notebook's.
+    """
+    data = read_articles(fake_path, true_path, random_state)
+    data["text"] = data["text"].apply(wordopt)
+    return data["text"], data["class"]
+
+
+def save_bundle(vectorizer, models, path=DEFAULT_BUNDLE_PATH):
+    """Store the fitted vectorizer and models in a single joblib file."""
+    joblib.dump({"vectorizer": vectorizer, "models": dict(models)}, path)
+    return path
+
+
+def load_bundle(path=DEFAULT_BUNDLE_PATH):
+    """Load a bundle written by save_bundle, returning (vectorizer, models)."""
+    bundle = joblib.load(path)
+    return bundle["vectorizer"], bundle["models"]
+
+
+class HashingTfidfVectorizer:
+    """TF-IDF on top of a stateless HashingVectorizer.
+
+    Unlike TfidfVectorizer it never holds a vocabulary or the corpus: the
+    only state is one document-frequency counter per hash bucket, filled by
+    calling partial_fit on successive chunks of text. transform() then
+    matches TfidfVectorizer's defaults (smooth idf, l2 normalisation).
+    """
+
+    def __init__(self, n_features=2 ** 20, ngram_range=(1, 1)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.hasher = HashingVectorizer(
+            n_features=n_features, ngram_range=ngram_range, alternate_sign=False, norm=None
+        )
+        self.n_docs_ = 0
+        self.df_ = np.zeros(n_features, dtype=np.int64)
+        self._idf = None
+
+    def partial_fit(self, texts):
+        counts = self.hasher.transform(texts)
+        # Each row of the hashed CSR matrix holds a bucket at most once.
+        self.df_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs_ += counts.shape[0]
+        self._idf = None
+        return self
+
+    @property
+    def idf_(self):
+        if self._idf is None:
+            if self.n_docs_ == 0:
+                raise ValueError("HashingTfidfVectorizer has not seen any documents yet")
+            self._idf = np.log((1 + self.n_docs_) / (1 + self.df_)) + 1
+        return self._idf
+
+    def transform(self, texts):
+        counts = self.hasher.transform(texts)
+        return normalize(counts @ sparse.diags(self.idf_), norm="l2", copy=False)
+
+    def __getstate__(self):
+        # idf_ is cheap to rebuild from df_, so keep the bundle small.
+        state = self.__dict__.copy()
+        state["_idf"] = None
+        return state
@@ -0,0 +1,224 @@
+"""
+Fake News Detector - cached training pipeline
+
+Runs the same steps as FAKE_NEWS_DETECTION.py as four cached stages:
+
+    load       read Fake.csv / True.csv, label and shuffle   -> articles.parquet
+    clean      apply wordopt to every article                -> cleaned.parquet
+    vectorize  train/test split + TF-IDF                     -> *.npz, vectorizer.joblib
+    train      fit the models (via train_parallel)           -> report.json, bundle
+
+Every stage writes its output to <cache-dir>/<stage>/<key>/, where the key
+is a hash of the upstream stage's key and this stage's parameters (for load,
+the CSV file contents). A stage whose key already exists is skipped, and
+its output is only read if a later stage needs it. So changing only the
+model hyperparameters re-runs just the train stage, and re-running with
+nothing changed only copies the cached bundle.
+
+Usage:
+    python pipeline.py --fake Fake.csv --true True.csv
+    python pipeline.py --model-params '{"RF": {"n_estimators": 300}, "KNN": {"n_tables": 30}}'
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from fake_news_utils import read_articles, save_bundle, wordopt
+
+
+DEFAULT_CACHE_DIR = ".pipeline_cache"
+
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_key(name, upstream, params):
+    payload = json.dumps({"stage": name, "upstream": upstream, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def write_frame(frame, directory, name):
+    """Store a DataFrame as parquet, or as compressed pickle without pyarrow."""
+    try:
+        frame.to_parquet(os.path.join(directory, f"{name}.parquet"), index=False)
+    except ImportError:
+        frame.to_pickle(os.path.join(directory, f"{name}.pkl.gz"))
+
+
+def read_frame(directory, name):
+    path = os.path.join(directory, f"{name}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return pd.read_pickle(os.path.join(directory, f"{name}.pkl.gz"))
+
+
+class Pipeline:
+    """Runs stages against a content-addressed cache directory."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def stage(self, name, upstream, params, compute, save, load):
+        """Run or reuse one stage.
+
+        Returns (key, get, path) where get() computes or loads the stage output
+        on first use, so cached stages are never read unless something needs
+        them, and path is the stage's cache directory.
+        """
+        key = stage_key(name, upstream, params)
+        path = os.path.join(self.cache_dir, name, key)
+        result = []
+
+        if os.path.exists(os.path.join(path, "stage.json")):
+            print(f"[{name}] cached ({key})")
+
+            def get():
+                if not result:
+                    result.append(load(path))
+                return result[0]
+            return key, get, path
+
+        print(f"[{name}] running ({key})")
+        started = time.perf_counter()
+        output = compute()
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        save(tmp, output)
+        with open(os.path.join(tmp, "stage.json"), "w") as f:
+            json.dump({"stage": name, "upstream": upstream, "params": params,
+                       "seconds": time.perf_counter() - started}, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        result.append(output)
+        return key, lambda: result[0], path
+
+
+def run(fake_path, true_path, cache_dir=DEFAULT_CACHE_DIR, random_state=0, test_size=0.25,
+        vectorizer_params=None, models=None, model_params=None, workers=None):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+
+    from train_parallel import MODEL_NAMES, print_report, train_parallel, write_report
+
+    pipeline = Pipeline(cache_dir)
+    vectorizer_params = vectorizer_params or {}
+    models = list(models or MODEL_NAMES)
+    model_params = model_params or {}
+
+    load_key, articles, _ = pipeline.stage(
+        "load", [file_digest(fake_path), file_digest(true_path)], {"random_state": random_state},
+        compute=lambda: read_articles(fake_path, true_path, random_state),
+        save=lambda d, frame: write_frame(frame, d, "articles"),
+        load=lambda d: read_frame(d, "articles"),
+    )
+
+    def clean():
+        frame = articles().copy()
+        frame["text"] = frame["text"].apply(wordopt)
+        return frame
+
+    # Editing wordopt changes its source and therefore the cache key.
+    clean_key, cleaned, _ = pipeline.stage(
+        "clean", load_key, {"wordopt": hashlib.sha256(inspect.getsource(wordopt).encode()).hexdigest()},
+        compute=clean,
+        save=lambda d, frame: write_frame(frame, d, "cleaned"),
+        load=lambda d: read_frame(d, "cleaned"),
+    )
+
+    def vectorize():
+        frame = cleaned()
+        x_train, x_test, y_train, y_test = train_test_split(
+            frame["text"], frame["class"], test_size=test_size, random_state=random_state
+        )
+        vectorization = TfidfVectorizer(**vectorizer_params)
+        return {
+            "vectorizer": vectorization,
+            "xv_train": vectorization.fit_transform(x_train),
+            "xv_test": vectorization.transform(x_test),
+            "y_train": y_train.to_numpy(),
+            "y_test": y_test.to_numpy(),
+        }
+
+    def save_vectorized(d, out):
+        joblib.dump(out["vectorizer"], os.path.join(d, "vectorizer.joblib"))
+        sparse.save_npz(os.path.join(d, "xv_train.npz"), out["xv_train"])
+        sparse.save_npz(os.path.join(d, "xv_test.npz"), out["xv_test"])
+        np.savez_compressed(os.path.join(d, "labels.npz"), y_train=out["y_train"], y_test=out["y_test"])
+
+    def load_vectorized(d):
+        labels = np.load(os.path.join(d, "labels.npz"))
+        return {
+            "vectorizer": joblib.load(os.path.join(d, "vectorizer.joblib")),
+            "xv_train": sparse.load_npz(os.path.join(d, "xv_train.npz")),
+            "xv_test": sparse.load_npz(os.path.join(d, "xv_test.npz")),
+            "y_train": labels["y_train"],
+            "y_test": labels["y_test"],
+        }
+
+    vectorize_key, vectorized, _ = pipeline.stage(
+        "vectorize", clean_key,
+        {"test_size": test_size, "random_state": random_state, "vectorizer": vectorizer_params},
+        compute=vectorize, save=save_vectorized, load=load_vectorized,
+    )
+
+    def train():
+        v = vectorized()
+        fitted, reports = train_parallel(
+            v["xv_train"], v["y_train"], v["xv_test"], v["y_test"], models, model_params, workers
+        )
+        return {"vectorizer": v["vectorizer"], "models": fitted, "reports": reports}
+
+    def save_trained(d, out):
+        save_bundle(out["vectorizer"], out["models"], os.path.join(d, "bundle.joblib"))
+        write_report(out["reports"], os.path.join(d, "report.json"))
+
+    def load_trained(d):
+        with open(os.path.join(d, "report.json")) as f:
+            return {"reports": json.load(f)["models"]}
+
+    _, trained, train_dir = pipeline.stage(
+        "train", vectorize_key, {"models": models, "params": {m: model_params.get(m, {}) for m in models}},
+        compute=train, save=save_trained, load=load_trained,
+    )
+    print_report(trained()["reports"])
+    return os.path.join(train_dir, "bundle.joblib")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the fake news training pipeline with cached stages")
+    parser.add_argument("--fake", default="Fake.csv")
+    parser.add_argument("--true", default="True.csv")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--random-state", type=int, default=0, help="Seed for shuffling and the train/test split")
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--vectorizer-params", type=json.loads, default={}, help="JSON kwargs for TfidfVectorizer")
+    parser.add_argument("--models", default=None, help="Comma-separated subset of LR,DT,GB,RF,KNN")
+    parser.add_argument("--model-params", type=json.loads, default={}, help='JSON, e.g. {"RF": {"n_estimators": 300}}')
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="fake_news_models.joblib", help="Where to copy the trained bundle")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    models = [m.strip() for m in args.models.split(",")] if args.models else None
+    bundle = run(args.fake, args.true, args.cache_dir, args.random_state, args.test_size,
+                 args.vectorizer_params, models, args.model_params, args.workers)
+    shutil.copyfile(bundle, args.output)
+    print(f"Bundle copied to {args.output}")
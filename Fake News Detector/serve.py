@@ -0,0 +1,259 @@
+"""
+Fake News Detector - HTTP scoring service
+
+Loads the models saved by FAKE_NEWS_DETECTION.py once at startup and serves
+predictions over a small local HTTP API. Requests that arrive within a few
+milliseconds of each other are coalesced into a single vectorize + predict
+call, trading a bounded amount of latency for throughput.
+
+Endpoints:
+    POST /predict   body {"text": "..."} -> {"predictions": {"LR": "Fake News", ...}}
+    GET  /metrics   latency / batch size histograms as JSON
+    GET  /health    liveness check
+
+Usage:
+    python serve.py --bundle fake_news_models.joblib --port 8000 \
+        --max-batch-size 32 --max-wait-ms 5
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_news_utils import DEFAULT_BUNDLE_PATH, load_bundle, output_lable, wordopt
+
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the style of a Prometheus histogram."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[str(bound)] = running
+            cumulative["+Inf"] = self._count
+            return {
+                "buckets": cumulative,
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0,
+            }
+
+
+class _Pending:
+    __slots__ = ("text", "enqueued", "done", "result", "error")
+
+    def __init__(self, text):
+        self.text = text
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects concurrent requests and scores them in one batch.
+
+    The worker thread blocks for the first request, then keeps collecting
+    until either max_batch_size requests are queued or max_wait_ms has
+    passed since the first one arrived.
+    """
+
+    def __init__(self, vectorizer, models, max_batch_size=32, max_wait_ms=5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.vectorizer = vectorizer
+        self.models = models
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.request_latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_size = Histogram((1, 2, 4, 8, 16, 32, 64, 128, 256))
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def predict(self, text, timeout=30.0):
+        """Queue one text and block until its batch has been scored."""
+        pending = _Pending(text)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError("prediction timed out")
+        self.request_latency_ms.observe((time.perf_counter() - pending.enqueued) * 1000)
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish the current batch, then let _loop see the sentinel.
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._score(self._collect(first))
+
+    def _score(self, batch):
+        started = time.perf_counter()
+        for pending in batch:
+            self.queue_wait_ms.observe((started - pending.enqueued) * 1000)
+        try:
+            features = self.vectorizer.transform([wordopt(p.text) for p in batch])
+            predictions = {name: model.predict(features) for name, model in self.models.items()}
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+        self.inference_ms.observe((time.perf_counter() - started) * 1000)
+        self.batch_size.observe(len(batch))
+        for i, pending in enumerate(batch):
+            pending.result = {name: output_lable(int(pred[i])) for name, pred in predictions.items()}
+            pending.done.set()
+
+    def metrics(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "request_latency_ms": self.request_latency_ms.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "inference_ms": self.inference_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+
+def make_handler(batcher):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send_json(200, batcher.metrics())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                text = payload["text"]
+                if not isinstance(text, str):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": 'expected JSON body {"text": "..."}'})
+                return
+            try:
+                predictions = batcher.predict(text)
+            except TimeoutError as e:
+                self._send_json(503, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"predictions": predictions})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a configurable listen backlog.
+
+    The default backlog of 5 makes the kernel refuse or drop connections as
+    soon as a burst of clients outpaces accept(), which is exactly the load
+    micro-batching is meant to absorb.
+    """
+
+    def __init__(self, server_address, handler_class, backlog=128):
+        self.request_queue_size = backlog
+        super().__init__(server_address, handler_class)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the fake news ensemble over HTTP")
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE_PATH, help="Model bundle written by FAKE_NEWS_DETECTION.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Largest number of requests scored together")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long to hold a batch open for more requests")
+    parser.add_argument("--backlog", type=int, default=128, help="Pending connections the listening socket queues")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    vectorizer, models = load_bundle(args.bundle)
+    print(f"Loaded {', '.join(models)} from {args.bundle}")
+    batcher = MicroBatcher(vectorizer, models, args.max_batch_size, args.max_wait_ms)
+    server = ScoringServer((args.host, args.port), make_handler(batcher), args.backlog)
+    print(f"Serving on http://{args.host}:{args.port} (max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
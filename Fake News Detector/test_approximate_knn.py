@@ -0,0 +1,91 @@
+"""
+Unit tests for the approximate KNN index
+
+Run tests with: pytest test_approximate_knn.py
+"""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.neighbors import NearestNeighbors
+
+from approximate_knn import ApproximateKNeighborsClassifier
+
+
+def news_like_corpus(n_articles, vocabulary=3000, words=120, story_size=6, seed=0):
+    """TF-IDF rows dominated by a shared Zipf background, like real articles.
+
+    Three quarters of every article's words come from the common background;
+    the rest come from a small story vocabulary shared by about story_size
+    articles, which are the true nearest neighbours.
+    """
+    rng = np.random.default_rng(seed)
+    background = 1.0 / np.arange(1, vocabulary + 1)
+    background /= background.sum()
+    stories = rng.integers(0, vocabulary, size=(n_articles // story_size + 1, 30))
+    story = rng.integers(0, len(stories), n_articles)
+    common = rng.choice(vocabulary, size=(n_articles, words * 3 // 4), p=background)
+    own = stories[story[:, None], rng.integers(0, 30, size=(n_articles, words - common.shape[1]))]
+    columns = np.hstack([common, own]).ravel()
+    rows = np.repeat(np.arange(n_articles), words)
+    counts = sp.csr_matrix((np.ones(columns.size), (rows, columns)), shape=(n_articles, vocabulary))
+    return TfidfTransformer().fit_transform(counts), story % 2
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y = news_like_corpus(4200)
+    X_train, y_train, X_query = X[:4000], y[:4000], X[4000:]
+    model = ApproximateKNeighborsClassifier(n_neighbors=5).fit(X_train, y_train)
+    return model, X_train, X_query
+
+
+class TestApproximateKNN:
+    """Shortlist size and recall of ApproximateKNeighborsClassifier."""
+
+    def test_corpus_has_large_mean_component(self, fitted):
+        """The corpus reproduces the skew that breaks uncentred hashing."""
+        model, X_train, _ = fitted
+        assert np.linalg.norm(model._project(X_train).mean(axis=0)) > 0.5
+
+    def test_shortlist_is_small(self, fitted):
+        """Centred hashing keeps each query's bucket-mates well below n."""
+        model, X_train, X_query = fitted
+        mask = model._candidates(model._hash(model._project(X_query)))
+        assert mask.sum(axis=1).mean() < X_train.shape[0] / 10
+        for codes in model._hash(model._Z):
+            assert np.unique(codes, return_counts=True)[1].max() < X_train.shape[0] / 20
+
+    def test_recall_against_exact(self, fitted):
+        model, X_train, X_query = fitted
+        exact = NearestNeighbors(n_neighbors=5).fit(X_train).kneighbors(X_query, return_distance=False)
+        approx = model.kneighbors(X_query)
+        recall = np.mean([len(np.intersect1d(a, e)) / 5 for a, e in zip(approx, exact)])
+        assert recall >= 0.5
+
+    def test_neighbours_are_sorted_closest_first(self, fitted):
+        model, _, X_query = fitted
+        neighbors = model.kneighbors(X_query[:20])
+        for query, rows in zip(X_query[:20], neighbors):
+            sims = (model._X[rows] @ query.T).toarray().ravel()
+            assert np.all(np.diff(sims) <= 1e-9)
+
+    def test_small_training_set_falls_back_to_exact(self):
+        """Queries with fewer than k bucket-mates scan every training row."""
+        X, y = news_like_corpus(60, seed=1)
+        model = ApproximateKNeighborsClassifier(n_neighbors=3, n_tables=1, n_bits=30).fit(X[:50], y[:50])
+        exact = NearestNeighbors(n_neighbors=3).fit(X[:50]).kneighbors(X[50:], return_distance=False)
+        assert np.array_equal(np.sort(model.kneighbors(X[50:]), axis=1), np.sort(exact, axis=1))
+        assert model.predict(X[50:]).shape == (10,)
+
+    def test_exact_similarity_with_trailing_empty_rows(self):
+        """Empty TF-IDF rows score 0 without shifting their neighbours' sums."""
+        X = sp.csr_matrix(np.array([[0.6, 0.8, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0]]))
+        model = ApproximateKNeighborsClassifier(n_neighbors=1, n_components=2).fit(X, [0, 1, 0, 1])
+        query = sp.csr_matrix(np.array([[0.6, 0.8, 0.0]]))
+        sims = model._exact_similarity(query, np.zeros(4, dtype=np.int64), np.array([0, 1, 2, 3]))
+        assert np.allclose(sims, [1.0, 0.0, 0.0, 0.0])
+        sims = model._exact_similarity(query, np.zeros(2, dtype=np.int64), np.array([0, 1]))
+        assert np.allclose(sims, [1.0, 0.0])
+        assert model._exact_similarity(query, np.zeros(2, dtype=np.int64), np.array([1, 3])).tolist() == [0.0, 0.0]
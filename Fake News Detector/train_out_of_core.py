@@ -0,0 +1,121 @@
+"""
+Fake News Detector - out-of-core training
+
+FAKE_NEWS_DETECTION.py loads both CSVs and the full TF-IDF vocabulary into
+memory, which does not scale to multi-GB news dumps. This script streams the
+CSVs in chunks instead, so memory is bounded by --chunk-size rather than by
+corpus size:
+
+    1. IDF pass      - hash every training chunk and count document frequencies
+    2. training pass - vectorize each chunk and partial_fit incremental models
+    3. test pass     - stream the held-out rows and report accuracy
+
+Rows are assigned to train/test by a hash of their text, so every pass sees
+the same split without having to remember it.
+
+Usage:
+    python train_out_of_core.py --fake Fake.csv --true True.csv --chunk-size 5000
+"""
+
+import argparse
+import time
+import zlib
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+from fake_news_utils import DEFAULT_BUNDLE_PATH, HashingTfidfVectorizer, save_bundle, wordopt
+
+
+CLASSES = np.array([0, 1])
+
+
+def make_models(random_state=0):
+    """Linear models that support partial_fit."""
+    return {
+        "LR": SGDClassifier(loss="log_loss", alpha=1e-6, random_state=random_state),
+        "SVM": SGDClassifier(loss="hinge", alpha=1e-6, random_state=random_state),
+        "NB": MultinomialNB(alpha=0.01),
+    }
+
+
+def _in_test_split(text, test_size):
+    return zlib.crc32(text.encode("utf-8")) % 10000 < test_size * 10000
+
+
+def iter_chunks(fake_path, true_path, chunk_size, test_size, split, seed=0):
+    """Yield (cleaned_texts, labels) chunks from both CSVs.
+
+    Fake and true chunks are read side by side and shuffled together, so the
+    incremental models never see a long run of a single class.
+    """
+    rng = np.random.default_rng(seed)
+    readers = [
+        pd.read_csv(fake_path, usecols=["text"], chunksize=chunk_size),
+        pd.read_csv(true_path, usecols=["text"], chunksize=chunk_size),
+    ]
+    for fake_chunk, true_chunk in zip_longest(*readers):
+        parts = []
+        for label, chunk in ((0, fake_chunk), (1, true_chunk)):
+            if chunk is not None:
+                parts.append(pd.DataFrame({"text": chunk["text"].fillna("").astype(str), "class": label}))
+        chunk = pd.concat(parts, ignore_index=True)
+        in_test = chunk["text"].map(lambda t: _in_test_split(t, test_size))
+        chunk = chunk[in_test] if split == "test" else chunk[~in_test]
+        if chunk.empty:
+            continue
+        chunk = chunk.iloc[rng.permutation(len(chunk))]
+        yield chunk["text"].map(wordopt).tolist(), chunk["class"].to_numpy()
+
+
+def train(fake_path, true_path, chunk_size=5000, n_features=2 ** 20, epochs=1, test_size=0.25):
+    vectorizer = HashingTfidfVectorizer(n_features=n_features)
+
+    started = time.perf_counter()
+    for texts, _ in iter_chunks(fake_path, true_path, chunk_size, test_size, "train"):
+        vectorizer.partial_fit(texts)
+    print(f"IDF pass: {vectorizer.n_docs_} documents in {time.perf_counter() - started:.1f}s")
+
+    models = make_models()
+    for epoch in range(epochs):
+        started = time.perf_counter()
+        for texts, labels in iter_chunks(fake_path, true_path, chunk_size, test_size, "train", seed=epoch):
+            features = vectorizer.transform(texts)
+            for model in models.values():
+                model.partial_fit(features, labels, classes=CLASSES)
+        print(f"Epoch {epoch + 1}/{epochs}: {time.perf_counter() - started:.1f}s")
+
+    correct = {name: 0 for name in models}
+    total = 0
+    for texts, labels in iter_chunks(fake_path, true_path, chunk_size, test_size, "test"):
+        features = vectorizer.transform(texts)
+        for name, model in models.items():
+            correct[name] += int((model.predict(features) == labels).sum())
+        total += len(labels)
+    if total:
+        for name in models:
+            print(f"{name} accuracy: {correct[name] / total:.4f} ({total} held-out rows)")
+
+    return vectorizer, models
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the fake news models out of core")
+    parser.add_argument("--fake", default="Fake.csv", help="CSV of fake articles (needs a 'text' column)")
+    parser.add_argument("--true", default="True.csv", help="CSV of real articles (needs a 'text' column)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows read from each CSV at a time")
+    parser.add_argument("--n-features", type=int, default=2 ** 20, help="Number of hash buckets")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the training rows")
+    parser.add_argument("--test-size", type=float, default=0.25, help="Fraction of rows held out for evaluation")
+    parser.add_argument("--output", default=DEFAULT_BUNDLE_PATH, help="Where to write the model bundle")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    vectorizer, models = train(args.fake, args.true, args.chunk_size, args.n_features, args.epochs, args.test_size)
+    save_bundle(vectorizer, models, args.output)
+    print(f"Saved bundle to {args.output}")
@@ -0,0 +1,177 @@
+"""
+Fake News Detector - parallel training and evaluation harness
+
+FAKE_NEWS_DETECTION.py fits LR, DT, GB, RF and KNN one after another on a
+single core. This script fits them concurrently in a process pool:
+
+  - the sparse TF-IDF train/test matrices are written once as .npy files and
+    every worker memory-maps them, so they are not copied into each process
+  - cores left over after one worker per model go to RandomForest (n_jobs)
+  - each worker reports fit time, predict throughput and accuracy, and the
+    results are written to a single JSON report
+
+Usage:
+    python train_parallel.py --fake Fake.csv --true True.csv --report training_report.json
+    python train_parallel.py --models LR,RF,KNN --workers 3 --save-bundle
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy import sparse
+
+
+MODEL_NAMES = ("LR", "DT", "GB", "RF", "KNN")
+
+
+def make_model(name, params=None, n_jobs=1):
+    """Build one of the ensemble's models with the notebook's default settings."""
+    params = dict(params or {})
+    if name == "LR":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**params)
+    if name == "DT":
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(**params)
+    if name == "GB":
+        from sklearn.ensemble import GradientBoostingClassifier
+        params.setdefault("random_state", 0)
+        return GradientBoostingClassifier(**params)
+    if name == "RF":
+        from sklearn.ensemble import RandomForestClassifier
+        params.setdefault("random_state", 0)
+        params.setdefault("n_jobs", n_jobs)
+        return RandomForestClassifier(**params)
+    if name == "KNN":
+        from approximate_knn import ApproximateKNeighborsClassifier
+        params.setdefault("n_neighbors", 5)
+        return ApproximateKNeighborsClassifier(**params)
+    raise ValueError(f"Unknown model {name!r}; expected one of {', '.join(MODEL_NAMES)}")
+
+
+def share_matrix(X, y, directory, name):
+    """Write a CSR matrix and its labels as .npy files and describe where they are."""
+    X = sparse.csr_matrix(X)
+    prefix = os.path.join(directory, name)
+    for part in ("data", "indices", "indptr"):
+        np.save(f"{prefix}_{part}.npy", getattr(X, part))
+    np.save(f"{prefix}_y.npy", np.asarray(y))
+    return {"prefix": prefix, "shape": X.shape}
+
+
+def load_shared(spec):
+    """Rebuild a matrix written by share_matrix on top of read-only memory maps."""
+    prefix = spec["prefix"]
+    parts = [np.load(f"{prefix}_{part}.npy", mmap_mode="r") for part in ("data", "indices", "indptr")]
+    X = sparse.csr_matrix(tuple(parts), shape=tuple(spec["shape"]), copy=False)
+    return X, np.load(f"{prefix}_y.npy", mmap_mode="r")
+
+
+def _fit_and_evaluate(name, params, n_jobs, train_spec, test_spec):
+    X_train, y_train = load_shared(train_spec)
+    X_test, y_test = load_shared(test_spec)
+    model = make_model(name, params, n_jobs)
+
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - started
+
+    report = {
+        "model": name,
+        "params": params or {},
+        "n_jobs": n_jobs,
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "predict_rows_per_second": X_test.shape[0] / predict_seconds if predict_seconds else float("inf"),
+        "accuracy": float(np.mean(pred == y_test)),
+    }
+    return name, report, model
+
+
+def train_parallel(xv_train, y_train, xv_test, y_test, models=MODEL_NAMES, params=None, workers=None):
+    """Fit and evaluate models in parallel.
+
+    params maps a model name to keyword arguments for its constructor.
+    Returns ({name: fitted model}, [per-model report dicts]).
+    """
+    params = params or {}
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, len(models)))
+    # Every worker keeps one core; whatever is left is handed to RandomForest.
+    spare = max(0, cores - workers)
+
+    fitted, reports = {}, []
+    with tempfile.TemporaryDirectory(prefix="fake_news_shared_") as shared_dir:
+        train_spec = share_matrix(xv_train, y_train, shared_dir, "train")
+        test_spec = share_matrix(xv_test, y_test, shared_dir, "test")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _fit_and_evaluate, name, params.get(name), 1 + (spare if name == "RF" else 0),
+                    train_spec, test_spec,
+                )
+                for name in models
+            ]
+            for future in as_completed(futures):
+                name, report, model = future.result()
+                fitted[name] = model
+                reports.append(report)
+                print(f"{name}: fit {report['fit_seconds']:.1f}s, accuracy {report['accuracy']:.4f}")
+    reports.sort(key=lambda r: list(models).index(r["model"]))
+    return fitted, reports
+
+
+def write_report(reports, path):
+    with open(path, "w") as f:
+        json.dump({"models": reports}, f, indent=2)
+    return path
+
+
+def print_report(reports):
+    print(f"\n{'Model':<6}{'Fit (s)':>10}{'Predict rows/s':>17}{'Accuracy':>10}")
+    for r in reports:
+        print(f"{r['model']:<6}{r['fit_seconds']:>10.2f}{r['predict_rows_per_second']:>17.0f}{r['accuracy']:>10.4f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the fake news models in parallel and report their cost")
+    parser.add_argument("--fake", default="Fake.csv")
+    parser.add_argument("--true", default="True.csv")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="Comma-separated subset of LR,DT,GB,RF,KNN")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per model, up to the core count)")
+    parser.add_argument("--report", default="training_report.json", help="Where to write the JSON report")
+    parser.add_argument("--save-bundle", action="store_true", help="Also save the vectorizer and fitted models for serve.py")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+
+    from fake_news_utils import load_articles, save_bundle
+
+    args = parse_args()
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    for name in models:
+        make_model(name)  # fail fast on typos before loading the data
+
+    x, y = load_articles(args.fake, args.true)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.25)
+    vectorization = TfidfVectorizer()
+    xv_train = vectorization.fit_transform(x_train)
+    xv_test = vectorization.transform(x_test)
+
+    fitted, reports = train_parallel(xv_train, y_train, xv_test, y_test, models, workers=args.workers)
+    print_report(reports)
+    print(f"\nReport written to {write_report(reports, args.report)}")
+    if args.save_bundle:
+        print(f"Bundle written to {save_bundle(vectorization, fitted)}")
@@ -0,0 +1,78 @@
+"""HOG fallback benchmark
+======================
+
+Runs the HOG detector over a recorded clip with the old settings (whole
+frame, winStride 4 every frame) and with the ROI/stride/reuse options, and
+reports FPS and recall. Recall is measured against the old settings'
+detections whose centre lies in a zone or the safety line's box (the
+people the monitor acts on), and optionally against ground truth.
+
+Usage:
+  python benchmark_hog.py platform.mp4 --frames 200 --line "0,600 1280,620"
+  python benchmark_hog.py platform.mp4 --truth boxes.json   # [[[x,y,w,h], ...] per frame]
+"""
+from __future__ import annotations
+import argparse, json, time
+from typing import List, Optional, Tuple
+import cv2, numpy as np
+
+from metro_monitor import MetroMonitor, PeopleDetector, assign, iou_matrix, parse_points
+
+Box = Tuple[int,int,int,int]
+
+VARIANTS = [
+    ("current: full frame, stride 4", dict(hog_reuse=1, hog_tiles=1, hog_sparse_stride=(4,4)), False),
+    ("ROIs", dict(hog_reuse=1, hog_sparse_stride=(4,4)), True),
+    ("ROIs + sparse stride 8", dict(hog_reuse=1), True),
+    ("ROIs + sparse stride 8 + reuse 2 (default)", dict(), True),
+]
+
+def matched(found: List[Box], reference: List[Box], min_iou: float = 0.5) -> int:
+    if not found or not reference: return 0
+    rows, _ = assign(1.0 - iou_matrix(np.asarray(reference, np.float64), np.asarray(found, np.float64)), 1.0 - min_iou)
+    return len(rows)
+
+def in_rois(boxes: List[Box], rois: List[Box]) -> List[Box]:
+    return [b for b in boxes if any(rx <= b[0]+b[2]//2 < rx+rw and ry <= b[1]+b[3]//2 < ry+rh for rx,ry,rw,rh in rois)]
+
+def run(path: str, n_frames: int, rois: Optional[List[Box]], **options) -> Tuple[List[List[Box]], float]:
+    detector = PeopleDetector(force_no_yolo=True, **options)
+    cap = cv2.VideoCapture(path); frames: List[List[Box]] = []; spent = 0.0
+    while len(frames) < n_frames:
+        ret, frame = cap.read()
+        if not ret: break
+        t0 = time.perf_counter(); frames.append(detector.detect(frame, rois)); spent += time.perf_counter() - t0
+    cap.release()
+    return frames, len(frames)/spent if spent else 0.0
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the HOG fallback settings on a recorded clip")
+    ap.add_argument('video')
+    ap.add_argument('--frames', type=int, default=200)
+    ap.add_argument('--line', type=parse_points, default=None, help='Safety line points, e.g. "0,300 640,320"')
+    ap.add_argument('--truth', type=str, default=None, help='JSON list of per-frame ground-truth boxes')
+    args = ap.parse_args()
+
+    mon = MetroMonitor(args.video, force_no_yolo=True); mon.cap.release()
+    mon.line_points = list(args.line or [])
+    rois = mon.detection_rois()
+    truth: Optional[List[List[Box]]] = None
+    if args.truth:
+        with open(args.truth) as f: truth = [[tuple(b) for b in boxes] for boxes in json.load(f)]
+
+    print(f"{'settings':<44}{'fps':>7}{'recall':>8}{'truth recall':>14}")
+    reference: Optional[List[List[Box]]] = None
+    for name, options, use_rois in VARIANTS:
+        found, fps = run(args.video, args.frames, rois if use_rois else None, **options)
+        if reference is None: reference = [in_rois(boxes, rois) for boxes in found]
+        ref_total = sum(map(len, reference))
+        recall = sum(matched(f, r) for f, r in zip(found, reference)) / ref_total if ref_total else float('nan')
+        line = f"{name:<44}{fps:>7.2f}{recall:>8.3f}"
+        if truth is not None:
+            gt = [in_rois(boxes, rois) for boxes in truth[:len(found)]]
+            gt_total = sum(map(len, gt))
+            line += f"{sum(matched(f, g) for f, g in zip(found, gt))/gt_total if gt_total else float('nan'):>14.3f}"
+        print(line)
+
+if __name__ == '__main__':
+    main()
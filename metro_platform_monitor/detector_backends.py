@@ -0,0 +1,278 @@
+"""Person detector backends
+========================
+
+PeopleDetector runs YOLO through one of these backends:
+
+  ultralytics   yolov8n.pt in PyTorch eager mode (the original behaviour)
+  onnxruntime   an exported .onnx model in ONNX Runtime (OpenVINO execution
+                provider when installed, CPU otherwise)
+  opencv        the same .onnx model in OpenCV's DNN module (no extra install)
+
+The exported-model backends run at a fixed input size (letterboxed; use a
+rectangular size such as 640x384 for 16:9 cameras to skip the padding), take
+a thread count, and support int8 (ONNX Runtime: quantized copy of the model,
+made once and cached next to it) and fp16 (OpenCV: DNN_TARGET_CPU_FP16 where
+the build/CPU supports it).
+
+Usage:
+  python detector_backends.py export yolov8n.pt --input-size 640x384 --int8 --calibration platform.mp4
+  python detector_backends.py bench platform.mp4 --backend onnxruntime --model yolov8n.int8.onnx --threads 4
+  python metro_monitor.py --video platform.mp4 --backend onnxruntime --model yolov8n.int8.onnx --threads 4
+"""
+from __future__ import annotations
+import argparse, os, time
+from typing import Dict, List, Optional, Tuple
+import cv2, numpy as np
+
+Box = Tuple[int,int,int,int]
+Size = Tuple[int,int]  # network input (width, height)
+BACKENDS = ("ultralytics", "onnxruntime", "opencv")
+PRECISIONS = ("fp32", "fp16", "int8")
+DEFAULT_MODELS = {"ultralytics": "yolov8n.pt", "onnxruntime": "yolov8n.onnx", "opencv": "yolov8n.onnx"}
+
+def parse_size(text) -> Size:
+    """640 -> (640, 640); '640x384' -> (640, 384)."""
+    if isinstance(text, (tuple, list)): return int(text[0]), int(text[1])
+    w, _, h = str(text).lower().partition("x")
+    return int(w), int(h or w)
+
+class DetectorBackend:
+    """Detects people in a batch of BGR frames; one list of x,y,w,h boxes per frame."""
+    name = "base"
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Box]]:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+class UltralyticsBackend(DetectorBackend):
+    name = "ultralytics"
+
+    def __init__(self, model: str = "yolov8n.pt", input_size: int | Size = 640, threads: Optional[int] = None,
+                 precision: str = "fp32", conf: float = 0.25):
+        from ultralytics import YOLO  # type: ignore
+        if threads:
+            import torch  # type: ignore
+            torch.set_num_threads(threads)
+        if precision != "fp32":
+            print(f"[WARN] ultralytics backend runs fp32 on CPU; export to ONNX for {precision}")
+        self.model = YOLO(model); self.model_path = model; self.input_size = parse_size(input_size); self.conf = conf
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Box]]:
+        w, h = self.input_size
+        return [self.boxes(r) for r in self.model(list(frames), imgsz=[h, w], conf=self.conf, verbose=False)]
+
+    @staticmethod
+    def boxes(r) -> List[Box]:
+        boxes: List[Box] = []
+        if not hasattr(r, 'boxes'): return boxes
+        for b in r.boxes:
+            cls = int(getattr(b,'cls',[0])[0]) if hasattr(b,'cls') else 0
+            if cls == 0:
+                x1,y1,x2,y2 = b.xyxy[0].cpu().numpy().astype(int)
+                boxes.append((x1,y1,x2-x1,y2-y1))
+        return boxes
+
+    def describe(self) -> str:
+        return f"{self.name} ({self.model_path}, {self.input_size[0]}x{self.input_size[1]})"
+
+class ExportedYoloBackend(DetectorBackend):
+    """Pre/post-processing shared by YOLOv8 models exported to ONNX.
+
+    Frames are letterboxed to the (width, height) input size (aspect kept,
+    grey padding); the raw output is (4 + classes) x anchors with cx,cy,w,h in
+    input pixels, of which only the person column (class 0) is used.
+    """
+    def __init__(self, model: str, input_size: int | Size, threads: Optional[int], precision: str,
+                 conf: float = 0.25, iou: float = 0.45):
+        self.model_path = model; self.input_size = parse_size(input_size); self.threads = threads
+        self.precision = precision; self.conf = conf; self.iou = iou
+
+    def letterbox(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int,int]]:
+        h, w = frame.shape[:2]; sw, sh = self.input_size
+        scale = min(sw/w, sh/h); nw, nh = int(round(w*scale)), int(round(h*scale))
+        px, py = (sw-nw)//2, (sh-nh)//2
+        canvas = np.full((sh, sw, 3), 114, np.uint8)
+        canvas[py:py+nh, px:px+nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        blob = cv2.dnn.blobFromImage(canvas, 1/255.0, swapRB=True)[0]  # 3 x sh x sw, RGB, float32
+        return blob, scale, (px, py)
+
+    def decode(self, out: np.ndarray, scale: float, pad: Tuple[int,int], shape: Tuple[int,...]) -> List[Box]:
+        out = out.reshape(out.shape[-2], out.shape[-1])
+        scores = out[4]; keep = scores > self.conf
+        if not keep.any(): return []
+        cx, cy, bw, bh = (out[:4, keep] / scale); scores = scores[keep]
+        x = cx - bw/2 - pad[0]/scale; y = cy - bh/2 - pad[1]/scale
+        rects = np.stack([x, y, bw, bh], 1)
+        idx = cv2.dnn.NMSBoxes(rects.tolist(), scores.tolist(), self.conf, self.iou)
+        H, W = shape[:2]; boxes: List[Box] = []
+        for i in np.asarray(idx).reshape(-1):
+            x0, y0 = max(0, int(rects[i,0])), max(0, int(rects[i,1]))
+            x1, y1 = min(W, int(rects[i,0]+rects[i,2])), min(H, int(rects[i,1]+rects[i,3]))
+            if x1 > x0 and y1 > y0: boxes.append((x0, y0, x1-x0, y1-y0))
+        return boxes
+
+    def describe(self) -> str:
+        w, h = self.input_size
+        return f"{self.name} ({os.path.basename(self.model_path)}, {w}x{h}, {self.precision}, threads={self.threads or 'auto'})"
+
+class OnnxRuntimeBackend(ExportedYoloBackend):
+    name = "onnxruntime"
+
+    def __init__(self, model: str = "yolov8n.onnx", input_size: int | Size = 640, threads: Optional[int] = None,
+                 precision: str = "fp32", conf: float = 0.25, iou: float = 0.45):
+        import onnxruntime as ort  # type: ignore
+        if precision == "int8" and not is_quantized(model):
+            model = quantize_int8(model)
+        elif precision == "fp16":
+            print("[WARN] ONNX Runtime's CPU provider has no fast fp16 kernels; running fp32")
+        super().__init__(model, input_size, threads, precision, conf, iou)
+        opts = ort.SessionOptions(); opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads: opts.intra_op_num_threads = threads; opts.inter_op_num_threads = 1
+        providers = [p for p in ("OpenVINOExecutionProvider", "CPUExecutionProvider") if p in ort.get_available_providers()]
+        self.session = ort.InferenceSession(model, opts, providers=providers)
+        inp = self.session.get_inputs()[0]; self.input_name = inp.name
+        fixed = fixed_input_size(inp.shape)
+        if fixed and fixed != self.input_size:
+            print(f"[INFO] {os.path.basename(model)} was exported at {fixed[0]}x{fixed[1]}; using that input size")
+            self.input_size = fixed
+        self.batch_size: Optional[int] = inp.shape[0] if isinstance(inp.shape[0], int) else None  # None: dynamic
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Box]]:
+        if not frames: return []
+        prepped = [self.letterbox(f) for f in frames]; blobs = [blob for blob,_,_ in prepped]
+        step = self.batch_size or len(blobs); outs: List[np.ndarray] = []
+        for i in range(0, len(blobs), step):  # a fixed batch is filled up with blank images
+            chunk = blobs[i:i+step]; chunk += [np.zeros_like(chunk[0])]*(step-len(chunk))
+            outs += list(self.session.run(None, {self.input_name: np.stack(chunk)})[0][:len(blobs)-i])
+        return [self.decode(o, scale, pad, f.shape) for o,(_,scale,pad),f in zip(outs, prepped, frames)]
+
+class OpenCVDnnBackend(ExportedYoloBackend):
+    name = "opencv"
+
+    def __init__(self, model: str = "yolov8n.onnx", input_size: int | Size = 640, threads: Optional[int] = None,
+                 precision: str = "fp32", conf: float = 0.25, iou: float = 0.45):
+        # OpenCV cannot report the model's input shape: input_size must match the export
+        if precision == "int8":
+            print("[WARN] OpenCV DNN int8 needs a quantized model; pass one with --model (running it as given)")
+        super().__init__(model, input_size, threads, precision, conf, iou)
+        if threads: cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromONNX(model)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        target = cv2.dnn.DNN_TARGET_CPU
+        if precision == "fp16":
+            target = getattr(cv2.dnn, "DNN_TARGET_CPU_FP16", None)
+            if target is None:
+                print("[WARN] this OpenCV build has no DNN_TARGET_CPU_FP16; running fp32"); target = cv2.dnn.DNN_TARGET_CPU; self.precision = "fp32"
+        self.net.setPreferableTarget(target)
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Box]]:
+        out: List[List[Box]] = []
+        for f in frames:
+            blob, scale, pad = self.letterbox(f)
+            self.net.setInput(blob[None]); out.append(self.decode(self.net.forward()[0], scale, pad, f.shape))
+        return out
+
+def load_backend(name: str = "ultralytics", model: Optional[str] = None, **options) -> DetectorBackend:
+    classes: Dict[str, type] = {"ultralytics": UltralyticsBackend, "onnxruntime": OnnxRuntimeBackend, "opencv": OpenCVDnnBackend}
+    if name not in classes: raise ValueError(f"Unknown detector backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    return classes[name](model or DEFAULT_MODELS[name], **options)
+
+# --- Model preparation ---
+def fixed_input_size(shape) -> Optional[Size]:
+    """(width, height) of an NCHW input shape, or None if either is dynamic."""
+    return (shape[3], shape[2]) if isinstance(shape[2], int) and isinstance(shape[3], int) else None
+
+def is_quantized(model: str) -> bool:
+    return ".int8." in os.path.basename(model)
+
+def quantize_int8(model: str, calibration: Optional[List[np.ndarray]] = None) -> str:
+    """Write <model>.int8.onnx (once) and return its path.
+
+    With calibration frames this is static QDQ quantization (weights and
+    activations int8, the fast path on CPUs with VNNI); without, weights
+    only (dynamic quantization).
+    """
+    out = os.path.splitext(model)[0] + ".int8.onnx"
+    if os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(model): return out
+    from onnxruntime import quantization as q  # type: ignore
+    print(f"[INFO] Quantizing {model} -> {out}")
+    if calibration:
+        class Frames(q.CalibrationDataReader):
+            def __init__(self):
+                import onnxruntime as ort  # type: ignore
+                inp = ort.InferenceSession(model, providers=["CPUExecutionProvider"]).get_inputs()[0]
+                prep = ExportedYoloBackend(model, fixed_input_size(inp.shape) or 640, None, "int8")
+                blobs = [prep.letterbox(f)[0] for f in calibration]
+                n = inp.shape[0] if isinstance(inp.shape[0], int) else 1  # a fixed-batch model takes exactly n frames
+                self.feed = iter([{inp.name: np.stack(blobs[i:i+n])} for i in range(0, len(blobs)-n+1, n)])
+            def get_next(self):
+                return next(self.feed, None)
+        q.quantize_static(model, out, Frames(), quant_format=q.QuantFormat.QDQ, per_channel=True,
+                          activation_type=q.QuantType.QUInt8, weight_type=q.QuantType.QInt8)
+    else:
+        print("[WARN] No calibration frames: weight-only int8, often slower than fp32 on CPU; "
+              "prefer `detector_backends.py export --int8 --calibration <video>`")
+        q.quantize_dynamic(model, out, weight_type=q.QuantType.QUInt8)
+    return out
+
+def read_frames(path: str, n: int, stride: int = 1) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(path); frames: List[np.ndarray] = []; i = 0
+    while len(frames) < n:
+        ret, frame = cap.read()
+        if not ret: break
+        if i % stride == 0: frames.append(frame)
+        i += 1
+    cap.release()
+    return frames
+
+def export(weights: str, input_size: int | Size = 640, int8: bool = False, calibration: Optional[str] = None,
+           batch: int = 1) -> str:
+    """Export YOLO weights to a fixed-size ONNX model (and optionally an int8 copy).
+
+    batch is the fixed number of frames per run; match multi_camera.py --max-batch.
+    """
+    from ultralytics import YOLO  # type: ignore
+    w, h = parse_size(input_size)
+    path = YOLO(weights).export(format="onnx", imgsz=[h, w], dynamic=False, batch=batch)
+    print(f"[INFO] Exported {path}")
+    if int8:
+        frames = read_frames(calibration, 100, stride=5) if calibration else None
+        path = quantize_int8(path, frames)
+    return path
+
+# --- CLI helpers shared by metro_monitor.py, batch_process.py and multi_camera.py ---
+def add_backend_args(ap: argparse.ArgumentParser):
+    g = ap.add_argument_group('detector backend')
+    g.add_argument('--backend', choices=BACKENDS, default='ultralytics', help='YOLO runtime')
+    g.add_argument('--model', type=str, default=None, help='Weights (.pt) or exported model (.onnx); default yolov8n.pt / yolov8n.onnx')
+    g.add_argument('--input-size', type=parse_size, default=(640,640), help='Fixed network input, 640 or WxH such as 640x384')
+    g.add_argument('--threads', type=int, default=None, help='Inference threads (default: runtime decides)')
+    g.add_argument('--precision', choices=PRECISIONS, default='fp32', help='int8 (onnxruntime) / fp16 (opencv) where supported')
+
+def backend_options(args) -> Dict[str, object]:
+    return dict(backend=args.backend, model=args.model, input_size=args.input_size, threads=args.threads, precision=args.precision)
+
+def bench(video: str, n_frames: int = 50, **options):
+    frames = read_frames(video, n_frames)
+    if not frames: raise SystemExit(f"[ERROR] Cannot read frames from {video}")
+    name = options.pop("backend", "ultralytics")
+    backend = load_backend(name, **options)
+    backend.detect_batch(frames[:1])  # warm-up (lazy init, allocations)
+    t0 = time.perf_counter(); found = sum(len(b) for f in frames for b in backend.detect_batch([f]))
+    dt = time.perf_counter() - t0
+    print(f"{backend.describe()}: {dt/len(frames)*1000:.1f} ms/frame ({len(frames)/dt:.1f} fps), {found} boxes over {len(frames)} frames")
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Export YOLO models and benchmark detector backends")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    ex = sub.add_parser('export', help='Export weights to fixed-size ONNX (optionally int8)')
+    ex.add_argument('weights'); ex.add_argument('--input-size', type=parse_size, default=(640,640), help='640 or WxH such as 640x384')
+    ex.add_argument('--int8', action='store_true'); ex.add_argument('--calibration', type=str, default=None, help='Video for static int8 calibration')
+    ex.add_argument('--batch', type=int, default=1, help='Fixed frames per run (multi_camera.py --max-batch)')
+    bp = sub.add_parser('bench', help='Time a backend on a video')
+    bp.add_argument('video'); bp.add_argument('--frames', type=int, default=50); add_backend_args(bp)
+    args = ap.parse_args()
+    if args.cmd == 'export': export(args.weights, args.input_size, args.int8, args.calibration, args.batch)
+    else: bench(args.video, args.frames, **backend_options(args))
@@ -0,0 +1,246 @@
+"""Events and metrics
+==================
+
+Structured output for running without a GUI:
+
+  EventBus        publish/subscribe for event dicts
+  EventRecorder   turns one camera's per-frame analysis into events:
+                    intrusion      a track crossed the safety line
+                    density_alert  a zone went over its density threshold
+                    density_clear  ... and came back under it
+                    zone_count     people in a zone changed (at most once per
+                                   count_interval seconds per zone; a change
+                                   held back by the interval is sent later)
+                  and feeds per-stage latencies into Metrics
+  EventLog        append-only JSONL file, one event per line, flushed per event
+  Metrics         counters, gauges and latency histograms in the Prometheus
+                  text format, served over HTTP by serve_metrics()
+
+Every event has a "type" and a timestamp: "time" (Unix seconds) for live
+sources, "frame" and "time_s" (video time) in batch mode, plus "camera" in
+multi_camera.py.
+
+Usage:
+  python metro_monitor.py --camera 0 --event-log events.jsonl --metrics-port 9108
+  curl -s localhost:9108/metrics
+"""
+from __future__ import annotations
+import argparse, bisect, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+Event = Dict[str, object]
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # seconds
+
+# name -> (type, help); names are exported with the "metro_" prefix
+METRICS = {
+    "frames_total": ("counter", "Frames analysed"),
+    "frames_skipped_total": ("counter", "Frames dropped because the detector could not keep up"),
+    "events_total": ("counter", "Events published, by type"),
+    "stage_latency_seconds": ("histogram", "Per-stage latency: detect, analyze (tracking, line, zones) and end_to_end (capture to result)"),
+    "tracks": ("gauge", "Live tracks"),
+    "zone_count": ("gauge", "People in the zone"),
+    "zone_density": ("gauge", "People per pixel in the zone"),
+    "zone_alert": ("gauge", "1 while the zone is over its density threshold"),
+}
+
+class EventBus:
+    """Synchronous publish/subscribe; subscribers run in the publishing thread."""
+    def __init__(self):
+        self._subscribers: List[Callable[[Event], None]] = []; self._lock = threading.Lock()
+
+    def subscribe(self, fn: Callable[[Event], None]):
+        with self._lock: self._subscribers.append(fn)
+
+    def publish(self, event: Event):
+        with self._lock: subscribers = list(self._subscribers)
+        for fn in subscribers:
+            try:
+                fn(event)
+            except Exception as e:
+                print(f"[ERR] Event subscriber failed: {e}")
+
+class EventLog:
+    """Append-only JSONL event file (reopened in append mode, never truncated)."""
+    def __init__(self, path: str):
+        self.path = path; self._f = open(path, "a"); self._lock = threading.Lock()
+
+    def __call__(self, event: Event):
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            if self._f.closed: return
+            self._f.write(line); self._f.flush()
+
+    def close(self):
+        with self._lock: self._f.close()
+
+class Histogram:
+    """Cumulative-bucket histogram as Prometheus expects (le = upper bound)."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets; self.counts = [0]*(len(buckets)+1); self.sum = 0.0; self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1; self.sum += value; self.count += 1
+
+def _labels(labels: Dict[str, object]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+def _fmt_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels: return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms keyed by (name, labels)."""
+    def __init__(self, prefix: str = "metro"):
+        self.prefix = prefix; self._lock = threading.Lock()
+        self._values: Dict[str, Dict[Tuple, float]] = {}; self._hists: Dict[str, Dict[Tuple, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {}); series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock: self._values.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            if key not in series: series[key] = Histogram()
+            series[key].observe(value)
+
+    def on_event(self, event: Event):
+        self.inc("events_total", type=event["type"], camera=event.get("camera"))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        out: List[str] = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._hists)):
+                kind, text = METRICS.get(name, ("untyped", name)); full = f"{self.prefix}_{name}"
+                out += [f"# HELP {full} {text}", f"# TYPE {full} {kind}"]
+                for key, v in sorted(self._values.get(name, {}).items()):
+                    out.append(f"{full}{_fmt_labels(key)} {v:g}")
+                for key, h in sorted(self._hists.get(name, {}).items()):
+                    total = 0
+                    for le, c in zip([f"{b:g}" for b in h.buckets] + ["+Inf"], h.counts):
+                        total += c; out.append(f"{full}_bucket{_fmt_labels(key + (('le', le),))} {total}")
+                    out += [f"{full}_sum{_fmt_labels(key)} {h.sum:.6f}", f"{full}_count{_fmt_labels(key)} {h.count}"]
+        return "\n".join(out) + "\n"
+
+def serve_metrics(metrics: Metrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /metrics on a daemon thread; call .shutdown() to stop."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404); return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body))); self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # no per-scrape stderr noise
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler); server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[INFO] Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+class EventRecorder:
+    """Events and metrics for one camera.
+
+    record() is called once per analysed frame with the (tracks, intrusions,
+    densities) that MetroMonitor.analyze returns; it publishes intrusion and
+    density alert/clear transitions, throttled zone counts, and updates the
+    gauges. emit=False (batch warm-up) updates the state without publishing.
+    A zone count that changes within count_interval of the last one sent is
+    held back and sent by the first record() after the interval, or by close().
+    """
+    def __init__(self, bus: EventBus, metrics: Optional[Metrics] = None, camera: Optional[str] = None,
+                 count_interval: float = 1.0):
+        self.bus = bus; self.metrics = metrics; self.camera = camera; self.count_interval = count_interval
+        self._alerting: Dict[str, bool] = {}; self._counts: Dict[str, Tuple[int, float]] = {}  # zone -> (last count, at)
+        self._pending: Dict[str, Event] = {}  # zone -> count change held back by count_interval
+
+    def observe(self, stage: str, seconds: float):
+        if self.metrics is not None: self.metrics.observe("stage_latency_seconds", seconds, stage=stage, camera=self.camera)
+
+    def skipped(self, n: int):
+        if self.metrics is not None and n > 0: self.metrics.inc("frames_skipped_total", n, camera=self.camera)
+
+    def record(self, tracks: List[Tuple[int, Tuple[int, int], bool]], intrusions: List[int],
+               densities: List[Tuple[str, int, float, float, bool]], now: Optional[float] = None,
+               emit: bool = True, **stamp) -> List[Event]:
+        """Publish this frame's events; stamp defaults to {"time": now} (wall clock)."""
+        now = time.time() if now is None else now
+        stamp = stamp or {"time": round(now, 3)}
+        if self.camera is not None: stamp["camera"] = self.camera
+        events: List[Event] = []
+        if intrusions:
+            positions = {tid: c for tid, c, _ in tracks}
+            for tid in intrusions:
+                x, y = positions[tid]
+                events.append({"type": "intrusion", **stamp, "track_id": tid, "x": x, "y": y})
+        for name, count, dens, thresh, over in densities:
+            if over != self._alerting.get(name, False):
+                events.append({"type": "density_alert" if over else "density_clear", **stamp,
+                               "zone": name, "count": count, "density": dens, "threshold": thresh})
+            self._alerting[name] = over
+            last, at = self._counts.get(name, (None, -float("inf")))
+            if count == last:
+                self._pending.pop(name, None)
+            elif now - at >= self.count_interval:
+                events.append({"type": "zone_count", **stamp, "zone": name, "count": count})
+                self._counts[name] = (count, now); self._pending.pop(name, None)
+            elif emit and self._pending.get(name, {}).get("count") != count:  # keep the stamp of the change
+                self._pending[name] = {"type": "zone_count", **stamp, "zone": name, "count": count}
+        if self.metrics is not None:
+            m, cam = self.metrics, self.camera
+            m.inc("frames_total", camera=cam); m.set("tracks", len(tracks), camera=cam)
+            for name, count, dens, _, over in densities:
+                m.set("zone_count", count, camera=cam, zone=name); m.set("zone_density", dens, camera=cam, zone=name)
+                m.set("zone_alert", int(over), camera=cam, zone=name)
+        if not emit: return []
+        for e in events: self.bus.publish(e)
+        return events
+
+    def close(self) -> List[Event]:
+        """Publish the zone counts still held back by count_interval (end of stream)."""
+        events = list(self._pending.values()); self._pending.clear()
+        for e in events: self.bus.publish(e)
+        return events
+
+class Telemetry:
+    """One process's event bus, optional event log and optional metrics endpoint."""
+    def __init__(self, event_log: Optional[str] = None, metrics_port: Optional[int] = None, host: str = "127.0.0.1"):
+        self.bus = EventBus(); self.metrics = Metrics(); self.bus.subscribe(self.metrics.on_event)
+        self.log = EventLog(event_log) if event_log else None
+        if self.log is not None: self.bus.subscribe(self.log)
+        self.server = serve_metrics(self.metrics, metrics_port, host) if metrics_port else None
+        self.recorders: List[EventRecorder] = []
+
+    def recorder(self, camera: Optional[str] = None, count_interval: float = 1.0) -> EventRecorder:
+        recorder = EventRecorder(self.bus, self.metrics, camera, count_interval)
+        self.recorders.append(recorder)
+        return recorder
+
+    def close(self):
+        for recorder in self.recorders: recorder.close()
+        if self.server is not None: self.server.shutdown(); self.server.server_close()
+        if self.log is not None: self.log.close()
+
+def add_event_args(ap: argparse.ArgumentParser):
+    g = ap.add_argument_group('events & metrics')
+    g.add_argument('--event-log', type=str, default=None, help='Append events (intrusion, density, zone counts) to this JSONL file')
+    g.add_argument('--metrics-port', type=int, default=None, help='Serve Prometheus metrics at http://METRICS_HOST:PORT/metrics')
+    g.add_argument('--metrics-host', type=str, default='127.0.0.1', help='Metrics bind address (default local only)')
+
+def telemetry_from_args(args) -> Optional[Telemetry]:
+    if not args.event_log and not args.metrics_port: return None
+    return Telemetry(args.event_log, args.metrics_port, args.metrics_host)
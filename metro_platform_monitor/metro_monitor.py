@@ -2,11 +2,19 @@
 =================================
 
 Features (current):
-  - Person detection (YOLOv8n if available, fallback to HOG)
-  - Simple centroid tracking (ID assignment, disappearance pruning)
-  - Intrusion detection (crossing a calibrated line)
-  - Zone crowd density & alert (configurable polygons & thresholds)
+  - Person detection (YOLOv8n via PyTorch, ONNX Runtime or OpenCV DNN if available; see detector_backends.py),
+    fallback to HOG searching only zone/line ROIs
+  - Centroid + IoU tracking with optimal (Hungarian) assignment and constant-velocity prediction
+  - Bounded per-track history (ring buffers), so memory stays flat over long sessions
+  - Intrusion detection (a track's move between frames crossing a calibrated line)
+  - Zone crowd density & alert (configurable polygons & thresholds; zones pre-rasterised into a bit mask)
   - Basic CLI interface (choose video source, optionally disable YOLO)
+  - Adaptive detection cadence (detector every N frames or on motion, tracker predicts in between)
+  - Threaded capture -> detect -> render pipeline (latest-frame-wins, per-stage FPS/latency)
+  - Headless batch mode for recorded video (events to JSONL/CSV, parallel time ranges; see batch_process.py)
+  - Multi-camera server: one batched detector for many cameras, per-camera metrics stream (see multi_camera.py)
+  - Structured events (intrusion, density alert/clear, zone counts) to an append-only log and a
+    Prometheus-style /metrics endpoint with counters and per-stage latency histograms (see events.py)
 
 Planned (not implemented in this minimal contribution):
   - Abandoned object detection
@@ -22,27 +30,350 @@ Usage:
   python metro_monitor.py --video path/to/video.mp4
   python metro_monitor.py --camera 0  (use webcam)
   python metro_monitor.py --video video.mp4 --no-yolo
+  python metro_monitor.py --camera 0 --no-yolo --target-fps 15
+  python metro_monitor.py --camera 0 --backend onnxruntime --model yolov8n.int8.onnx --threads 4
+  python metro_monitor.py --camera 0 --event-log events.jsonl --metrics-port 9108
+  python metro_monitor.py --video night.mp4 --headless --events events.jsonl --workers 4
 
 Made Hacktoberfest-friendly: single file, clear docstring, easy to extend.
 """
 from __future__ import annotations
-import argparse, time
+import argparse, math, threading, time
+from collections import deque
 from dataclasses import dataclass, field
 from typing import List, Tuple, Dict, Optional
 import cv2, numpy as np
+from detector_backends import DetectorBackend, add_backend_args, backend_options, load_backend
+from events import EventRecorder, add_event_args, telemetry_from_args
+try:
+    from scipy.optimize import linear_sum_assignment  # optional: optimal track assignment
+except ImportError:
+    linear_sum_assignment = None
+
+class TrackHistory:
+    """Last `maxlen` centroids of a track in a preallocated ring buffer.
+
+    Appends overwrite the oldest entry, so a track's memory is fixed no
+    matter how long it lives. Supports len(), h[-1] / h[i] and to_array()
+    (oldest first).
+    """
+    __slots__ = ("buf", "head", "count")
+
+    def __init__(self, maxlen: int = 64):
+        self.buf = np.empty((maxlen, 2), np.int32); self.head = 0; self.count = 0
+
+    def append(self, point: Tuple[int,int]):
+        self.buf[self.head] = point
+        self.head = (self.head + 1) % len(self.buf); self.count = min(self.count + 1, len(self.buf))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> Tuple[int,int]:
+        if not -self.count <= i < self.count: raise IndexError("track history index out of range")
+        x, y = self.buf[(self.head - self.count + i) % len(self.buf) if i >= 0 else (self.head + i) % len(self.buf)]
+        return int(x), int(y)
+
+    def to_array(self) -> np.ndarray:
+        return np.roll(self.buf, -self.head, axis=0)[len(self.buf) - self.count:] if self.count else self.buf[:0].copy()
 
 @dataclass
 class Track:
     id: int
     centroid: Tuple[int,int]
     last_seen: float = field(default_factory=time.time)
-    history: List[Tuple[int,int]] = field(default_factory=list)
+    history: TrackHistory = field(default_factory=TrackHistory)  # measured centroids, newest last
     crossed: bool = False
+    box: Optional[Tuple[int,int,int,int]] = None
+    velocity: Tuple[float,float] = (0.0, 0.0)  # px/s, smoothed over detections
+    prev_centroid: Optional[Tuple[int,int]] = None  # centroid at the previous intrusion check
+
+    def __post_init__(self):
+        if not len(self.history): self.history.append(self.centroid)
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N,4) and (M,4) arrays of x,y,w,h boxes -> (N,M)."""
+    ax1,ay1=a[:,0,None],a[:,1,None]; ax2=ax1+a[:,2,None]; ay2=ay1+a[:,3,None]
+    bx1,by1=b[None,:,0],b[None,:,1]; bx2=bx1+b[None,:,2]; by2=by1+b[None,:,3]
+    inter=np.clip(np.minimum(ax2,bx2)-np.maximum(ax1,bx1),0,None)*np.clip(np.minimum(ay2,by2)-np.maximum(ay1,by1),0,None)
+    union=(a[:,2]*a[:,3])[:,None]+(b[:,2]*b[:,3])[None,:]-inter
+    return inter/np.maximum(union,1e-9)
+
+def nms(boxes: List[Tuple[int,int,int,int]], iou: float = 0.5) -> List[Tuple[int,int,int,int]]:
+    """Drop boxes overlapping an earlier, larger box by more than `iou` (duplicates from overlapping tiles)."""
+    if len(boxes) < 2: return list(boxes)
+    b = np.asarray(boxes, np.float64); order = np.argsort(-(b[:,2]*b[:,3]), kind="stable")
+    overlaps = iou_matrix(b[order], b[order]) > iou
+    keep = np.ones(len(order), bool)
+    for i in range(len(order)):
+        if keep[i]: keep[i+1:] &= ~overlaps[i, i+1:]
+    return [boxes[k] for k in order[keep]]
+
+def assign(cost: np.ndarray, max_cost: float, solver: str = "auto") -> Tuple[np.ndarray,np.ndarray]:
+    """Match rows to columns minimising total cost; pairs above max_cost are never matched.
+
+    Leaving a row or a column unmatched costs max_cost/2, so the optimum
+    never buys an extra match with several poor ones (e.g. shifting every
+    ID by one slot when a new person enters a queue).
+    solver="hungarian" uses scipy's linear_sum_assignment (optimal), "greedy"
+    repeatedly accepts mutually-cheapest row/column pairs, which gives the
+    same result as cheapest-pair-first greedy matching but in a few
+    vectorised rounds. "auto" picks hungarian when scipy is installed.
+    """
+    empty=np.empty(0,np.intp)
+    if cost.size==0: return empty,empty
+    if solver=="auto": solver="hungarian" if linear_sum_assignment is not None else "greedy"
+    if solver=="hungarian":
+        n,m=cost.shape; big=np.full((n+m,m+n),1e9)
+        big[:n,:m]=np.where(cost<=max_cost,cost,1e9)
+        big[np.arange(n),m+np.arange(n)]=max_cost/2; big[n+np.arange(m),np.arange(m)]=max_cost/2
+        big[n:,m:]=0
+        r,c=linear_sum_assignment(big)
+        keep=(r<n)&(c<m); r,c=r[keep],c[keep]; keep=cost[r,c]<=max_cost
+        return r[keep],c[keep]
+    c=np.where(cost<=max_cost,cost,np.inf); rows,cols=[],[]
+    idx=np.arange(c.shape[0])
+    while True:
+        best_c=c.argmin(1); best_r=c.argmin(0)
+        mutual=np.isfinite(c[idx,best_c]) & (best_r[best_c]==idx)
+        if not mutual.any(): break
+        r=idx[mutual]; k=best_c[mutual]; rows.append(r); cols.append(k)
+        c[r,:]=np.inf; c[:,k]=np.inf
+    return (np.concatenate(rows),np.concatenate(cols)) if rows else (empty,empty)
+
+class Tracker:
+    """Multi-object tracker: constant-velocity prediction + centroid/IoU assignment.
+
+    Each update predicts every track forward to `now`, scores all
+    detection/track pairs at once (distance to the predicted centroid,
+    normalised by max_match_dist, plus 1 - IoU with the predicted box),
+    and solves the assignment in one call. Pairs further apart than
+    max_match_dist are never matched.
+
+    `tracks` is kept in order of last update (matched tracks are moved to
+    the end), so stale tracks are always at the front and pruning stops at
+    the first live one instead of scanning every track.
+    """
+    def __init__(self, max_match_dist: float = 200.0, max_disappeared: float = 2.0, solver: str = "auto",
+                 history_len: int = 64):
+        self.tracks: Dict[int,Track] = {}; self.next_id=1
+        self.max_match_dist=max_match_dist; self.max_disappeared=max_disappeared; self.solver=solver
+        self.history_len=history_len
+
+    @staticmethod
+    def _offset(tr: Track, now: float) -> Tuple[int,int]:
+        dt=now-tr.last_seen
+        return int(round(tr.velocity[0]*dt)), int(round(tr.velocity[1]*dt))
+
+    def update(self, detections: List[Tuple[int,int,int,int]], now: Optional[float]=None) -> List[int]:
+        """Associate one frame of detections; returns the track ID given to each detection."""
+        now=time.time() if now is None else now
+        dets=np.asarray(detections,np.float64).reshape(-1,4)
+        cen=np.stack([dets[:,0]+dets[:,2]//2, dets[:,1]+dets[:,3]//2],1)
+        tracks=list(self.tracks.values())
+        rows=cols=np.empty(0,np.intp)
+        if len(dets) and tracks:
+            off=np.array([self._offset(tr,now) for tr in tracks],np.float64)
+            pred_c=np.array([tr.history[-1] for tr in tracks],np.float64)+off
+            pred_b=np.array([tr.box or (*tr.history[-1],0,0) for tr in tracks],np.float64); pred_b[:,:2]+=off
+            dist=np.hypot(cen[:,None,0]-pred_c[None,:,0], cen[:,None,1]-pred_c[None,:,1])
+            cost=dist/self.max_match_dist + (1.0-iou_matrix(dets,pred_b))
+            cost[dist>self.max_match_dist]=np.inf
+            rows,cols=assign(cost, 2.0, self.solver)
+        ids=[0]*len(dets)
+        for r,k in zip(rows.tolist(),cols.tolist()):
+            tr=tracks[k]; ids[r]=tr.id; cx,cy=int(cen[r,0]),int(cen[r,1]); px,py=tr.history[-1]; dt=now-tr.last_seen
+            if dt>0: tr.velocity=(0.8*tr.velocity[0]+0.2*(cx-px)/dt, 0.8*tr.velocity[1]+0.2*(cy-py)/dt)
+            tr.centroid=(cx,cy); tr.box=tuple(detections[r]); tr.history.append((cx,cy)); tr.last_seen=now
+            self.tracks[tr.id]=self.tracks.pop(tr.id)  # move to the end: most recently seen
+        for r in range(len(dets)):
+            if ids[r]: continue
+            ids[r]=self.next_id; cx,cy=int(cen[r,0]),int(cen[r,1])
+            self.tracks[self.next_id]=Track(id=self.next_id, centroid=(cx,cy), last_seen=now,
+                                            history=TrackHistory(self.history_len), box=tuple(detections[r]))
+            self.next_id+=1
+        # remove stale: oldest first, stop at the first live track
+        while self.tracks:
+            tid=next(iter(self.tracks))
+            if now-self.tracks[tid].last_seen<=self.max_disappeared: break
+            del self.tracks[tid]
+        return ids
+
+    def predict(self, now: Optional[float]=None) -> List[Tuple[int,int,int,int]]:
+        """Move tracks along their velocity for a frame the detector skipped.
+
+        Positions are extrapolated from the last detection (history and
+        last_seen are untouched, so stale tracks still expire); returns the
+        predicted boxes to stand in for detections.
+        """
+        now=time.time() if now is None else now
+        boxes=[]
+        for tr in self.tracks.values():
+            dx,dy=self._offset(tr,now); px,py=tr.history[-1]
+            tr.centroid=(px+dx, py+dy)
+            if tr.box is not None:
+                x,y,w,h=tr.box; boxes.append((x+dx,y+dy,w,h))
+        return boxes
+
+class ZoneIndex:
+    """Zones rasterised once into a bit mask for vectorised point-in-zone tests.
+
+    Bit i of mask[y, x] is set when pixel (x, y) lies in zone i, so
+    overlapping zones are fine and all centroids are classified with one
+    array lookup. The mask only covers the zones' bounding box; areas and
+    thresholds are cached alongside. `key` identifies the zone list the
+    index was built from, so callers can rebuild it when zones change.
+    """
+    def __init__(self, zones: List[Tuple[str,List[Tuple[int,int]],float]]):
+        if len(zones) > 64: raise ValueError(f"ZoneIndex supports at most 64 zones, got {len(zones)}")
+        self.key = self.make_key(zones)
+        self.names = [name for name,_,_ in zones]
+        self.thresholds = np.array([thresh for _,_,thresh in zones], np.float64)
+        polys = [np.array(poly,np.int32).reshape(-1,2) for _,poly,_ in zones]
+        self.areas = np.array([cv2.contourArea(p) for p in polys], np.float64)
+        dtype = next(t for t in (np.uint8,np.uint16,np.uint32,np.uint64) if np.iinfo(t).bits >= max(len(zones),1))
+        pts = np.concatenate(polys) if polys else np.zeros((1,2),np.int32)
+        self.origin = pts.min(0); w,h = pts.max(0) - self.origin + 1
+        self.mask = np.zeros((h,w), dtype); self.bits = np.left_shift(np.ones(len(zones),dtype), np.arange(len(zones),dtype=dtype))
+        layer = np.zeros((h,w), np.uint8)
+        for bit,poly in zip(self.bits,polys):
+            layer[:] = 0; cv2.fillPoly(layer, [poly - self.origin], 1)
+            self.mask[layer > 0] |= bit
+
+    @staticmethod
+    def make_key(zones) -> tuple:
+        return tuple((name, tuple(map(tuple,poly)), thresh) for name,poly,thresh in zones)
+
+    def counts(self, points: np.ndarray) -> np.ndarray:
+        """Number of (N,2) x,y points inside each zone."""
+        pts = np.asarray(points, np.int64).reshape(-1,2) - self.origin
+        h,w = self.mask.shape
+        pts = pts[(pts[:,0]>=0) & (pts[:,1]>=0) & (pts[:,0]<w) & (pts[:,1]<h)]
+        labels = self.mask[pts[:,1], pts[:,0]]
+        return ((labels[:,None] & self.bits) != 0).sum(0)
+
+class SafetyLine:
+    """Calibrated safety line, preprocessed once for vectorised crossing tests.
+
+    Points are sorted by x. `lut` holds the line's y for every integer x
+    between the end points, and the trigger line (the safety line shifted
+    `margin` px down, i.e. onto the track side) is kept as segment arrays.
+    `key` identifies the points/margin it was built from.
+    """
+    def __init__(self, points: List[Tuple[int,int]], margin: float = 10.0):
+        if len(points) < 2: raise ValueError("a safety line needs at least 2 points")
+        self.key = (tuple(map(tuple,points)), margin)
+        pts = np.array(sorted(points, key=lambda p: p[0]), np.float64)
+        self.x0 = int(pts[0,0])
+        self.lut = np.interp(np.arange(self.x0, int(pts[-1,0])+1), pts[:,0], pts[:,1])
+        trigger = pts + (0.0, margin)
+        self.a = trigger[:-1]; self.b = trigger[1:]
+
+    def y_at(self, x: int) -> Optional[float]:
+        i = int(x) - self.x0
+        return float(self.lut[i]) if 0 <= i < len(self.lut) else None
+
+    def crossings(self, prev: np.ndarray, cur: np.ndarray) -> np.ndarray:
+        """For (N,2) previous/current points, True where the move prev -> cur
+        crosses the trigger line from the safe side (above) to beyond it."""
+        prev = np.asarray(prev, np.float64).reshape(-1,1,2); cur = np.asarray(cur, np.float64).reshape(-1,1,2)
+        a, b = self.a[None], self.b[None]
+        def orient(o, p, q):  # z of (p-o) x (q-o); > 0 means q is below directed o->p in image coords
+            return (p[...,0]-o[...,0])*(q[...,1]-o[...,1]) - (p[...,1]-o[...,1])*(q[...,0]-o[...,0])
+        d_prev, d_cur = orient(a, b, prev), orient(a, b, cur)
+        d_a, d_b = orient(prev, cur, a), orient(prev, cur, b)
+        return ((d_prev <= 0) & (d_cur > 0) & (d_a*d_b <= 0)).any(1)
+
+class LatestFrameBuffer:
+    """Small ring buffer between pipeline stages.
+
+    put() never blocks (the oldest entry falls off when full) and readers
+    always get the newest entry, so a slow consumer skips frames instead of
+    falling behind or stalling its producer.
+    """
+    def __init__(self, size: int = 2):
+        self._buf: deque = deque(maxlen=size); self._cond = threading.Condition()
+        self._seq = 0; self.closed = False
+
+    def put(self, item):
+        with self._cond:
+            self._seq += 1; self._buf.append((self._seq, item)); self._cond.notify_all()
+
+    def get_latest(self, after_seq: int = 0, timeout: Optional[float] = None):
+        """Newest (seq, item) with seq > after_seq, waiting up to timeout; None if none arrived."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.closed or (self._buf and self._buf[-1][0] > after_seq), timeout)
+            if self._buf and self._buf[-1][0] > after_seq: return self._buf[-1]
+            return None
+
+    def peek(self):
+        with self._cond:
+            return self._buf[-1] if self._buf else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True; self._cond.notify_all()
+
+class StageStats:
+    """Exponential moving averages of one pipeline stage's rate and latency."""
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha; self.fps = 0.0; self.latency_ms = 0.0; self.skipped = 0; self._last: Optional[float] = None
+
+    def tick(self, latency_s: Optional[float] = None):
+        now = time.perf_counter()
+        if self._last is not None and now > self._last:
+            inst = 1.0/(now-self._last)
+            self.fps = inst if self.fps == 0 else (1-self.alpha)*self.fps + self.alpha*inst
+        self._last = now
+        if latency_s is not None:
+            ms = latency_s*1000
+            self.latency_ms = ms if self.latency_ms == 0 else (1-self.alpha)*self.latency_ms + self.alpha*ms
+
+@dataclass
+class DetectionResult:
+    frame_seq: int
+    captured_at: float
+    detections: List[Tuple[int,int,int,int]]
+    tracks: List[Tuple[int,Tuple[int,int],bool]]  # (id, centroid, crossed) snapshot
+    intrusions: List[int]
+    densities: List[Tuple[str,int,float,float,bool]]
 
 class PeopleDetector:
-    def __init__(self, force_no_yolo: bool = False):
+    """YOLO/HOG person detector with an optional adaptive cadence.
+
+    With target_fps > 0, should_detect() lets callers skip the detector on
+    most frames: it runs every `interval` frames, where interval is chosen
+    from the measured detector latency so the amortised cost per frame fits
+    the target frame budget, and earlier whenever frame differencing against
+    the last detected frame shows more than motion_threshold of the pixels
+    changed. With target_fps = 0 (default) every frame is detected.
+
+    The HOG fallback only searches regions of interest when callers pass
+    them (MetroMonitor passes its zones and safety line), padded by half
+    the tallest expected person and split into overlapping columns. Each
+    tile is re-searched every `hog_reuse` frames (staggered, cached boxes
+    in between), and tiles where the last search found nobody use the
+    coarser `hog_sparse_stride`. hog_reuse=1, hog_tiles=1 and
+    hog_sparse_stride=hog_stride without ROIs is the old full-frame search.
+    """
+    HOG_SCALE = 0.6  # frames are downscaled by this before the HOG search
+    HOG_WINDOW = (64, 128)
+
+    def __init__(self, force_no_yolo: bool = False, target_fps: float = 0.0,
+                 motion_threshold: float = 0.02, max_interval: int = 15,
+                 hog_stride: Tuple[int,int] = (4,4), hog_sparse_stride: Tuple[int,int] = (8,8),
+                 hog_reuse: int = 2, hog_tiles: int = 3, max_person_frac: float = 0.4,
+                 backend: str = "ultralytics", model: Optional[str] = None, input_size: int | Tuple[int,int] = 640,
+                 threads: Optional[int] = None, precision: str = "fp32"):
+        self.target_fps = target_fps; self.motion_threshold = motion_threshold; self.max_interval = max_interval
+        self.hog_stride = hog_stride; self.hog_sparse_stride = hog_sparse_stride; self.hog_reuse = max(1, hog_reuse)
+        self.hog_tiles = max(1, hog_tiles); self.max_person_frac = max_person_frac
+        self._hog_state: Dict[object, dict] = {}  # per stream: regions, cached boxes per tile, frame counter
+        self.interval = 1; self.latency_s = 0.0  # detector latency, exponential moving average
+        self._since = 0; self._ref: Optional[np.ndarray] = None  # frames since / thumbnail of last detection
         self.hog = cv2.HOGDescriptor(); self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
-        self.yolo = None
+        self.backend = backend; self.backend_options = dict(model=model, input_size=input_size, threads=threads, precision=precision)
+        self.yolo: Optional[DetectorBackend] = None
         self.enabled_yolo = False if force_no_yolo else True
         if self.enabled_yolo:
             self.try_load_yolo()
@@ -50,197 +381,405 @@ class PeopleDetector:
     def try_load_yolo(self):
         if self.yolo is not None: return
         try:
-            from ultralytics import YOLO  # type: ignore
-            self.yolo = YOLO("yolov8n.pt")
-            print("[INFO] YOLOv8n loaded")
+            self.yolo = load_backend(self.backend, **self.backend_options)
+            print(f"[INFO] YOLO loaded: {self.yolo.describe()}")
         except Exception as e:
             print(f"[WARN] YOLO load failed: {e}. Falling back to HOG only.")
             self.yolo=None; self.enabled_yolo=False
 
-    def detect(self, frame) -> List[Tuple[int,int,int,int]]:
+    @staticmethod
+    def _thumb(frame) -> np.ndarray:
+        # small blurred grey copy: cheap to diff and insensitive to sensor noise
+        g = cv2.cvtColor(cv2.resize(frame,(160,90),interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(g,(5,5),0)
+
+    def motion_score(self, frame) -> float:
+        """Fraction of pixels that changed noticeably since the last detected frame."""
+        if self._ref is None: return 1.0
+        return float(np.count_nonzero(cv2.absdiff(self._thumb(frame), self._ref) > 25)) / self._ref.size
+
+    def should_detect(self, frame) -> bool:
+        if self.target_fps <= 0: return True
+        self._since += 1
+        return self._since >= self.interval or self.motion_score(frame) > self.motion_threshold
+
+    def detect(self, frame, rois: Optional[List[Tuple[int,int,int,int]]] = None, stream: object = 0) -> List[Tuple[int,int,int,int]]:
+        """rois: x,y,w,h areas the HOG fallback restricts itself to (None: whole frame);
+        stream: identifies the video so per-stream HOG caches do not mix."""
+        t0 = time.perf_counter()
+        boxes = self._detect(frame, rois, stream)
+        if self.target_fps > 0:
+            dt = time.perf_counter() - t0
+            self.latency_s = dt if not self.latency_s else 0.8*self.latency_s + 0.2*dt
+            # amortised per-frame cost latency/N must fit the 1/target_fps budget
+            self.interval = max(1, min(self.max_interval, math.ceil(self.latency_s*self.target_fps)))
+            self._since = 0; self._ref = self._thumb(frame)
+        return boxes
+
+    def detect_batch(self, frames: List[np.ndarray], rois: Optional[List[Optional[List[Tuple[int,int,int,int]]]]] = None,
+                     streams: Optional[List[object]] = None) -> List[List[Tuple[int,int,int,int]]]:
+        """Detect people in several frames with one YOLO call (HOG, which has no
+        batch API, still runs per frame). Does not touch the adaptive cadence."""
+        out: List[List[Tuple[int,int,int,int]]] = [[] for _ in frames]
+        rois = rois or [None]*len(frames); streams = streams or list(range(len(frames)))
+        if self.enabled_yolo and self.yolo is not None and frames:
+            try:
+                out = self.yolo.detect_batch(list(frames))
+            except Exception as e:
+                print(f"[ERR] YOLO inference error: {e}")
+        return [boxes or self._hog(frame, roi, stream) for boxes,frame,roi,stream in zip(out,frames,rois,streams)]
+
+    def _detect(self, frame, rois=None, stream: object = 0) -> List[Tuple[int,int,int,int]]:
         boxes: List[Tuple[int,int,int,int]] = []
         if self.enabled_yolo and self.yolo is not None:
             try:
-                res = self.yolo(frame, verbose=False)
-                for r in res:
-                    if not hasattr(r, 'boxes'): continue
-                    for b in r.boxes:
-                        cls = int(getattr(b,'cls',[0])[0]) if hasattr(b,'cls') else 0
-                        if cls == 0:
-                            x1,y1,x2,y2 = b.xyxy[0].cpu().numpy().astype(int)
-                            boxes.append((x1,y1,x2-x1,y2-y1))
+                boxes = self.yolo.detect_batch([frame])[0]
             except Exception as e:
                 print(f"[ERR] YOLO inference error: {e}")
         if not boxes: # fallback to HOG if empty
-            scale=0.6
-            resized = cv2.resize(frame,(int(frame.shape[1]*scale),int(frame.shape[0]*scale)))
-            rects,_ = self.hog.detectMultiScale(resized, winStride=(4,4), padding=(8,8), scale=1.05)
-            for (x,y,w,h) in rects:
-                boxes.append((int(x/scale), int(y/scale), int(w/scale), int(h/scale)))
+            boxes = self._hog(frame, rois, stream)
         return boxes
 
+    def hog_regions(self, rois: Optional[List[Tuple[int,int,int,int]]], width: int, height: int) -> List[Tuple[int,int,int,int]]:
+        """Search tiles for a frame: padded ROIs (overlaps merged) cut into overlapping columns."""
+        if not rois:
+            regions = [(0, 0, width, height)]
+        else:
+            pad = int(height*self.max_person_frac/2)  # a person centred on the ROI edge still fits
+            regions = [(max(0,x-pad), max(0,y-pad), min(width,x+w+pad), min(height,y+h+pad)) for x,y,w,h in rois]
+            merged = True
+            while merged and len(regions) > 1:
+                merged = False
+                for i in range(len(regions)):
+                    for j in range(i+1, len(regions)):
+                        a, b = regions[i], regions[j]
+                        if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                            regions[i] = (min(a[0],b[0]), min(a[1],b[1]), max(a[2],b[2]), max(a[3],b[3])); del regions[j]
+                            merged = True; break
+                    if merged: break
+            regions = [(x0, y0, x1-x0, y1-y0) for x0,y0,x1,y1 in regions if x1 > x0 and y1 > y0]
+        overlap = int(self.HOG_WINDOW[0]/self.HOG_SCALE)  # a person on a tile border is whole in one tile
+        tiles = []
+        for x,y,w,h in regions:
+            n = max(1, min(self.hog_tiles, w // (2*overlap)))
+            for k in range(n):
+                x0 = x + k*w//n; x1 = x + (k+1)*w//n
+                tiles.append((max(x, x0-overlap//2), y, min(x+w, x1+overlap//2) - max(x, x0-overlap//2), h))
+        return tiles
+
+    def _hog(self, frame, rois=None, stream: object = 0) -> List[Tuple[int,int,int,int]]:
+        st = self._hog_state.setdefault(stream, {"frame": 0, "tiles": None, "cache": {}})
+        tiles = self.hog_regions(rois, frame.shape[1], frame.shape[0])
+        if tiles != st["tiles"]: st["tiles"] = tiles; st["cache"] = {}  # zones/line/frame size changed
+        st["frame"] += 1
+        boxes: List[Tuple[int,int,int,int]] = []
+        for i,tile in enumerate(tiles):
+            cached = st["cache"].get(tile)
+            if cached is not None and (st["frame"] + i) % self.hog_reuse:
+                boxes.extend(cached); continue
+            stride = self.hog_sparse_stride if cached is not None and not cached else self.hog_stride
+            found = self._hog_search(frame, tile, stride)
+            st["cache"][tile] = found; boxes.extend(found)
+        return nms(boxes) if len(tiles) > 1 else boxes
+
+    def _hog_search(self, frame, tile: Tuple[int,int,int,int], stride: Tuple[int,int]) -> List[Tuple[int,int,int,int]]:
+        x0,y0,w,h = tile; scale = self.HOG_SCALE
+        crop = frame[y0:y0+h, x0:x0+w]
+        size = (int(w*scale), int(h*scale))
+        if size[0] < self.HOG_WINDOW[0] or size[1] < self.HOG_WINDOW[1]: return []
+        rects,_ = self.hog.detectMultiScale(cv2.resize(crop, size), winStride=stride, padding=(8,8), scale=1.05)
+        return [(x0+int(x/scale), y0+int(y/scale), int(w/scale), int(h/scale)) for (x,y,w,h) in rects]
+
 class MetroMonitor:
-    def __init__(self, src: str | int, force_no_yolo: bool=False):
-        self.cap = cv2.VideoCapture(src)
-        if not self.cap.isOpened():
+    def __init__(self, src: str | int | None, force_no_yolo: bool=False, target_fps: float=0.0, motion_threshold: float=0.02,
+                 detector: Optional[PeopleDetector]=None, frame_size: Optional[Tuple[int,int]]=None,
+                 detector_options: Optional[Dict]=None, recorder: Optional[EventRecorder]=None):
+        # src=None: analysis only (no capture); the caller supplies detections, e.g. multi_camera.py,
+        # which shares one detector between cameras and passes (width, height) for the default zone
+        self.cap = cv2.VideoCapture(src) if src is not None else None
+        if self.cap is not None and not self.cap.isOpened():
             raise SystemExit(f"[ERROR] Cannot open source: {src}")
-        self.detector = PeopleDetector(force_no_yolo=force_no_yolo)
-        self.tracks: Dict[int,Track] = {}; self.next_id=1; self.max_disappeared=2.0
+        self.is_file = isinstance(src, str)
+        self.detector = detector or PeopleDetector(force_no_yolo=force_no_yolo, target_fps=target_fps, motion_threshold=motion_threshold,
+                                                   **(detector_options or {}))
+        self.tracker = Tracker(); self.tracks = self.tracker.tracks  # same dict, never rebound
+        self.recorder = recorder  # events + stage latencies; None: nothing recorded
         self.line_points: List[Tuple[int,int]] = []; self.calibrating_line=False
-        self.zones: List[Tuple[str,List[Tuple[int,int]], float]] = []
+        self.line_margin=10; self._line: Optional[SafetyLine] = None
+        self.zones: List[Tuple[str,List[Tuple[int,int]], float]] = []; self._zone_index: Optional[ZoneIndex] = None
         self.show_zones=True; self.enable_density=True; self.show_ids=True
-        ret, frame = self.cap.read()
-        if ret:
-            h,w=frame.shape[:2]
+        if self.cap is not None:
+            ret, frame = self.cap.read()
+            if ret: frame_size = (frame.shape[1], frame.shape[0])
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES,0)
+        if frame_size:
+            w,h=frame_size
             platform = [(int(w*0.05), int(h*0.4)), (int(w*0.95), int(h*0.4)), (int(w*0.95), int(h*0.95)), (int(w*0.05), int(h*0.95))]
             self.zones.append(("PLATFORM", platform, 0.00025))
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES,0)
+        # pipeline state: tracks/line/zones are shared by the detection worker and the UI thread
+        self.lock = threading.Lock(); self.paused = False; self._toggle_yolo = False
+        self._stop = threading.Event()
+        self.frames = LatestFrameBuffer(); self.results = LatestFrameBuffer()
+        self.stats = {"capture": StageStats(), "detect": StageStats(), "render": StageStats()}
 
     # --- Mouse ---
     def mouse(self,event,x,y,flags,param):
-        if self.calibrating_line and event==cv2.EVENT_LBUTTONDOWN:
-            self.line_points.append((x,y))
-        elif self.calibrating_line and event==cv2.EVENT_RBUTTONDOWN and self.line_points:
-            self.line_points.pop()
+        with self.lock:
+            if self.calibrating_line and event==cv2.EVENT_LBUTTONDOWN:
+                self.line_points.append((x,y))
+            elif self.calibrating_line and event==cv2.EVENT_RBUTTONDOWN and self.line_points:
+                self.line_points.pop()
 
     # --- Tracking ---
-    def update_tracks(self, detections: List[Tuple[int,int,int,int]]):
-        centroids = [(x+w//2, y+h//2, (x,y,w,h)) for (x,y,w,h) in detections]
-        used=set(); now=time.time()
-        for cx,cy,box in centroids:
-            best=None; bestd=99999
-            for tid,tr in self.tracks.items():
-                if tid in used: continue
-                d=(tr.centroid[0]-cx)**2+(tr.centroid[1]-cy)**2
-                if d<bestd and d<200**2: bestd=d; best=tid
-            if best is None:
-                self.tracks[self.next_id]=Track(id=self.next_id, centroid=(cx,cy), history=[(cx,cy)])
-                self.next_id+=1
-            else:
-                tr=self.tracks[best]; tr.centroid=(cx,cy); tr.history.append((cx,cy)); tr.last_seen=now; used.add(best)
-        # remove stale
-        drop=[tid for tid,tr in self.tracks.items() if now-tr.last_seen>self.max_disappeared]
-        for tid in drop: del self.tracks[tid]
+    def update_tracks(self, detections: List[Tuple[int,int,int,int]], now: Optional[float]=None):
+        # now: wall clock by default; batch mode passes the video timestamp instead
+        self.tracker.update(detections, now)
+
+    def predict_tracks(self, now: Optional[float]=None) -> List[Tuple[int,int,int,int]]:
+        return self.tracker.predict(now)
 
     # --- Line helpers ---
-    def interp_line_y(self, x:int)->Optional[float]:
+    def detection_rois(self) -> List[Tuple[int,int,int,int]]:
+        """Bounding boxes of the zones and the safety line: where the HOG fallback needs to look."""
+        shapes = [poly for _,poly,_ in self.zones] + ([self.line_points] if len(self.line_points) >= 2 else [])
+        return [tuple(int(v) for v in cv2.boundingRect(np.array(p, np.int32).reshape(-1,2))) for p in shapes if len(p)]
+
+    def safety_line(self) -> Optional[SafetyLine]:
+        """Preprocessed line_points, rebuilt only when the points (or margin) change."""
         if len(self.line_points)<2: return None
-        pts=sorted(self.line_points,key=lambda p:p[0])
-        for i in range(len(pts)-1):
-            x1,y1=pts[i]; x2,y2=pts[i+1]
-            if x1<=x<=x2 or x2<=x<=x1:
-                if x2!=x1:
-                    t=(x-x1)/(x2-x1)
-                    return y1 + t*(y2-y1)
-                return (y1+y2)/2
-        return None
-
-    def detect_intrusions(self, frame):
-        if len(self.line_points)<2: return []
+        if self._line is None or self._line.key != (tuple(map(tuple,self.line_points)), self.line_margin):
+            self._line = SafetyLine(self.line_points, self.line_margin)
+        return self._line
+
+    def interp_line_y(self, x:int)->Optional[float]:
+        line=self.safety_line()
+        return line.y_at(x) if line is not None else None
+
+    def detect_intrusions(self, frame=None):
+        """Flag tracks whose move since the previous check crossed the line (once per track)."""
+        tracks=list(self.tracks.values()); line=self.safety_line()
+        hits=np.zeros(len(tracks),bool)
+        if line is not None and tracks:
+            hits=line.crossings([tr.prev_centroid or tr.centroid for tr in tracks], [tr.centroid for tr in tracks])
         intr=[]
-        for tid,tr in self.tracks.items():
-            if tr.crossed: continue
-            y_line=self.interp_line_y(tr.centroid[0])
-            if y_line is None: continue
-            if tr.centroid[1] > y_line + 10:
-                tr.crossed=True; intr.append(tid)
-                cv2.putText(frame,"INTRUSION!",(tr.centroid[0]-40,tr.centroid[1]-25),cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
+        for tr,hit in zip(tracks,hits.tolist()):
+            tr.prev_centroid=tr.centroid
+            if hit and not tr.crossed:
+                tr.crossed=True; intr.append(tr.id)
+                if frame is not None: self.draw_intrusion(frame, tr.centroid)
         return intr
 
+    @staticmethod
+    def draw_intrusion(frame, centroid):
+        cv2.putText(frame,"INTRUSION!",(centroid[0]-40,centroid[1]-25),cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
+
     def zone_density(self, detections):
+        if not self.zones: return []
+        if self._zone_index is None or self._zone_index.key != ZoneIndex.make_key(self.zones):
+            self._zone_index = ZoneIndex(self.zones)  # zones were edited: rasterise again
+        zi=self._zone_index
+        dets=np.asarray(detections,np.int64).reshape(-1,4)
+        counts=zi.counts(np.stack([dets[:,0]+dets[:,2]//2, dets[:,1]+dets[:,3]//2],1))
         out=[]
-        for name,poly,thresh in self.zones:
-            cnt=np.array(poly,np.int32); area=cv2.contourArea(cnt)
-            c=0
-            for (x,y,w,h) in detections:
-                cx=float(x+w//2); cy=float(y+h//2)
-                if cv2.pointPolygonTest(cnt.astype(np.float32),(cx,cy),False)>=0: c+=1
+        for name,c,area,thresh in zip(zi.names,counts.tolist(),zi.areas.tolist(),zi.thresholds.tolist()):
             dens=c/area if area>0 else 0
             over=dens>thresh and self.enable_density
             out.append((name,c,dens,thresh,over))
         return out
 
-    # --- Main ---
-    def run(self):
-        paused=False
-        cv2.namedWindow("MetroMonitor")
-        cv2.setMouseCallback("MetroMonitor", self.mouse)
-        while True:
-            if not paused:
-                ret, frame = self.cap.read()
-                if not ret:
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES,0); continue
-            disp=frame.copy()
-            dets=self.detector.detect(frame)
-            self.update_tracks(dets)
-
-            # zones
-            if self.show_zones:
-                for name,poly,_ in self.zones:
-                    cv2.polylines(disp,[np.array(poly,np.int32)],True,(60,120,255),2)
-                    cv2.putText(disp,name,(poly[0][0],poly[0][1]-10),cv2.FONT_HERSHEY_SIMPLEX,0.5,(60,120,255),1)
-
-            # line
-            if len(self.line_points)>=2:
-                cv2.polylines(disp,[np.array(self.line_points,np.int32)],False,(0,0,255),3)
-                for p in self.line_points: cv2.circle(disp,p,4,(0,0,255),-1)
-                if self.calibrating_line:
-                    cv2.putText(disp,f"Line pts: {len(self.line_points)} (ENTER to save)",(20,40),cv2.FONT_HERSHEY_SIMPLEX,0.55,(0,255,255),2)
-
-            # det boxes
-            for (x,y,w,h) in dets: cv2.rectangle(disp,(x,y),(x+w,y+h),(0,255,0),2)
-            for tid,tr in self.tracks.items():
-                col=(0,0,255) if tr.crossed else (255,255,0)
-                cv2.circle(disp,tr.centroid,5,col,-1)
-                if self.show_ids: cv2.putText(disp,f"ID{tid}",(tr.centroid[0]+6,tr.centroid[1]-6),cv2.FONT_HERSHEY_SIMPLEX,0.4,col,1)
-
-            intr=self.detect_intrusions(disp)
-            densities=self.zone_density(dets)
-
-            # panel
-            cv2.rectangle(disp,(10,10),(340,120),(0,0,0),-1)
-            cv2.rectangle(disp,(10,10),(340,120),(255,255,255),1)
-            cv2.putText(disp,f"Tracks: {len(self.tracks)}",(20,30),cv2.FONT_HERSHEY_SIMPLEX,0.5,(255,255,255),1)
-            for i,(name,c,d,th,over) in enumerate(densities[:3]):
-                cv2.putText(disp,f"{name}: {c} ({d*1000:.2f}k)",(20,50+18*i),cv2.FONT_HERSHEY_SIMPLEX,0.45,(0,255,0) if not over else (0,0,255),1)
-                if over:
-                    cv2.putText(disp,"DENSITY ALERT",(180,50+18*i),cv2.FONT_HERSHEY_SIMPLEX,0.4,(0,0,255),1)
-            if intr: cv2.putText(disp,f"INTRUSIONS: {len(intr)}",(20,110),cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
-
-            cv2.putText(disp,"q quit|p pause|y YOLO|l line|z zones|d density|c IDs",(20,disp.shape[0]-15),cv2.FONT_HERSHEY_SIMPLEX,0.45,(255,255,255),1)
-            cv2.imshow("MetroMonitor",disp)
-            k=cv2.waitKey(1) & 0xFF
-            if k==ord('q'): break
-            elif k==ord('p'): paused=not paused
-            elif k==ord('y'):
+    # --- Pipeline stages ---
+    def _capture_loop(self):
+        # Files are paced to their native FPS so they play like a camera feed.
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+        period = 1.0/fps if fps and fps > 0 else 0.0
+        next_t = time.perf_counter()
+        while not self._stop.is_set():
+            if self.paused: time.sleep(0.01); next_t = time.perf_counter(); continue
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.is_file: self.cap.set(cv2.CAP_PROP_POS_FRAMES,0)
+                else: time.sleep(0.01)
+                continue
+            self.frames.put((frame, time.perf_counter())); self.stats["capture"].tick()
+            if period:
+                next_t += period; delay = next_t - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+                else: next_t = time.perf_counter()  # running behind: don't try to catch up
+
+    def _detect_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            got = self.frames.get_latest(seq, timeout=0.1)
+            if got is None: continue
+            if seq and got[0] > seq+1:
+                self.stats["detect"].skipped += got[0]-seq-1
+                if self.recorder: self.recorder.skipped(got[0]-seq-1)
+            seq, (frame, captured_at) = got
+            if self._toggle_yolo:
+                self._toggle_yolo = False
                 if self.detector.enabled_yolo and self.detector.yolo is not None:
                     self.detector.enabled_yolo=False; print("[INFO] YOLO disabled -> HOG only")
                 else:
                     print("[INFO] Enabling YOLO..."); self.detector.enabled_yolo=True; self.detector.try_load_yolo()
-            elif k==ord('l'):
+            t0 = time.perf_counter()
+            dets, tracks, intr, densities = self.process_frame(frame)
+            self.stats["detect"].tick(time.perf_counter()-t0)
+            if self.recorder:
+                self.recorder.record(tracks, intr, densities); self.recorder.observe("end_to_end", time.perf_counter()-captured_at)
+            self.results.put(DetectionResult(seq, captured_at, dets, tracks, intr, densities))
+
+    def process_frame(self, frame, now: Optional[float]=None):
+        """Detect, track and evaluate one frame; shared by the live pipeline and batch mode."""
+        if not self.detector.should_detect(frame): return self.analyze(None, now)
+        with self.lock: rois = self.detection_rois()
+        t0 = time.perf_counter(); dets = self.detector.detect(frame, rois)
+        if self.recorder: self.recorder.observe("detect", time.perf_counter()-t0)
+        return self.analyze(dets, now)
+
+    def analyze(self, dets: Optional[List[Tuple[int,int,int,int]]], now: Optional[float]=None):
+        """Track, check intrusions and zone densities for one frame's detections
+        (None: the detector skipped this frame, so tracks are predicted)."""
+        t0 = time.perf_counter()
+        with self.lock:
+            if dets is None: dets = self.predict_tracks(now)
+            else: self.update_tracks(dets, now)
+            intr = self.detect_intrusions()
+            densities = self.zone_density(dets)
+            tracks = [(tid, tr.centroid, tr.crossed) for tid,tr in self.tracks.items()]
+        if self.recorder: self.recorder.observe("analyze", time.perf_counter()-t0)
+        return dets, tracks, intr, densities
+
+    def render(self, frame, res: Optional[DetectionResult]):
+        disp=frame.copy()
+        with self.lock:
+            zones=list(self.zones); line=list(self.line_points); calibrating=self.calibrating_line
+
+        # zones
+        if self.show_zones:
+            for name,poly,_ in zones:
+                cv2.polylines(disp,[np.array(poly,np.int32)],True,(60,120,255),2)
+                cv2.putText(disp,name,(poly[0][0],poly[0][1]-10),cv2.FONT_HERSHEY_SIMPLEX,0.5,(60,120,255),1)
+
+        # line
+        if len(line)>=2:
+            cv2.polylines(disp,[np.array(line,np.int32)],False,(0,0,255),3)
+            for p in line: cv2.circle(disp,p,4,(0,0,255),-1)
+        if calibrating:
+            cv2.putText(disp,f"Line pts: {len(line)} (ENTER to save)",(20,disp.shape[0]-40),cv2.FONT_HERSHEY_SIMPLEX,0.55,(0,255,255),2)
+
+        dets, tracks, intr, densities = (res.detections, res.tracks, res.intrusions, res.densities) if res else ([],[],[],[])
+        # det boxes
+        for (x,y,w,h) in dets: cv2.rectangle(disp,(x,y),(x+w,y+h),(0,255,0),2)
+        for tid,centroid,crossed in tracks:
+            col=(0,0,255) if crossed else (255,255,0)
+            cv2.circle(disp,centroid,5,col,-1)
+            if self.show_ids: cv2.putText(disp,f"ID{tid}",(centroid[0]+6,centroid[1]-6),cv2.FONT_HERSHEY_SIMPLEX,0.4,col,1)
+            if tid in intr: self.draw_intrusion(disp, centroid)
+
+        # panel
+        cv2.rectangle(disp,(10,10),(340,160),(0,0,0),-1)
+        cv2.rectangle(disp,(10,10),(340,160),(255,255,255),1)
+        cv2.putText(disp,f"Tracks: {len(tracks)}",(20,30),cv2.FONT_HERSHEY_SIMPLEX,0.5,(255,255,255),1)
+        for i,(name,c,d,th,over) in enumerate(densities[:3]):
+            cv2.putText(disp,f"{name}: {c} ({d*1000:.2f}k)",(20,50+18*i),cv2.FONT_HERSHEY_SIMPLEX,0.45,(0,255,0) if not over else (0,0,255),1)
+            if over:
+                cv2.putText(disp,"DENSITY ALERT",(180,50+18*i),cv2.FONT_HERSHEY_SIMPLEX,0.4,(0,0,255),1)
+        if intr: cv2.putText(disp,f"INTRUSIONS: {len(intr)}",(20,110),cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
+        cap,det,ui=self.stats["capture"],self.stats["detect"],self.stats["render"]
+        age=(time.perf_counter()-res.captured_at)*1000 if res else 0.0
+        cv2.putText(disp,f"cap {cap.fps:.1f}fps | det {det.fps:.1f}fps {det.latency_ms:.0f}ms | ui {ui.fps:.1f}fps",(20,132),cv2.FONT_HERSHEY_SIMPLEX,0.4,(200,200,200),1)
+        cv2.putText(disp,f"result age {age:.0f}ms | det skipped {det.skipped} | det every {self.detector.interval}",(20,150),cv2.FONT_HERSHEY_SIMPLEX,0.4,(200,200,200),1)
+
+        cv2.putText(disp,"q quit|p pause|y YOLO|l line|z zones|d density|c IDs",(20,disp.shape[0]-15),cv2.FONT_HERSHEY_SIMPLEX,0.45,(255,255,255),1)
+        return disp
+
+    def handle_key(self, k: int) -> bool:
+        """Apply one keypress; returns False when the user asked to quit."""
+        if k==ord('q'): return False
+        elif k==ord('p'): self.paused=not self.paused
+        elif k==ord('y'): self._toggle_yolo=True  # applied by the detection worker between frames
+        elif k==ord('l'):
+            with self.lock:
                 self.calibrating_line=not self.calibrating_line
                 if self.calibrating_line:
                     self.line_points=[]; print("[CAL] Click to add points; ENTER to finalize")
-            elif k==13 and self.calibrating_line:
-                self.calibrating_line=False; print(f"[CAL] Line saved with {len(self.line_points)} points")
-            elif k==ord('r'):
-                self.line_points=[]; print("[CAL] Line reset")
-            elif k==ord('z'): self.show_zones=not self.show_zones
-            elif k==ord('d'): self.enable_density=not self.enable_density
-            elif k==ord('c'): self.show_ids=not self.show_ids
-        self.cap.release(); cv2.destroyAllWindows()
+        elif k==13 and self.calibrating_line:
+            self.calibrating_line=False; print(f"[CAL] Line saved with {len(self.line_points)} points")
+        elif k==ord('r'):
+            with self.lock: self.line_points=[]
+            print("[CAL] Line reset")
+        elif k==ord('z'): self.show_zones=not self.show_zones
+        elif k==ord('d'): self.enable_density=not self.enable_density
+        elif k==ord('c'): self.show_ids=not self.show_ids
+        return True
+
+    # --- Main ---
+    def run(self):
+        """Capture, detection and rendering each run at their own rate.
+
+        The capture thread fills a latest-frame-wins buffer, the detection
+        worker always takes the newest frame (skipping any it could not keep
+        up with), and this (UI) thread draws every captured frame with the
+        most recent detection result on top.
+        """
+        cv2.namedWindow("MetroMonitor")
+        cv2.setMouseCallback("MetroMonitor", self.mouse)
+        workers=[threading.Thread(target=self._capture_loop,name="capture",daemon=True),
+                 threading.Thread(target=self._detect_loop,name="detect",daemon=True)]
+        for t in workers: t.start()
+        frame=None; seq=0
+        try:
+            while True:
+                got=self.frames.get_latest(seq, timeout=0.05)
+                if got is not None: seq,(frame,_)=got
+                if frame is not None:
+                    res=self.results.peek()
+                    cv2.imshow("MetroMonitor",self.render(frame, res[1] if res else None))
+                    self.stats["render"].tick()
+                if not self.handle_key(cv2.waitKey(1) & 0xFF): break
+        finally:
+            self._stop.set(); self.frames.close(); self.results.close()
+            for t in workers: t.join(timeout=2.0)
+            self.cap.release(); cv2.destroyAllWindows()
 
 
+def parse_points(text: str) -> List[Tuple[int,int]]:
+    """'x1,y1 x2,y2 ...' -> [(x1,y1), (x2,y2), ...]"""
+    return [tuple(int(v) for v in p.split(',')) for p in text.split()]
+
 def parse_args():
     ap=argparse.ArgumentParser(description="Metro platform monitoring (intrusion + density)")
     gsrc=ap.add_mutually_exclusive_group(required=True)
     gsrc.add_argument('--video', type=str, help='Path to video file')
     gsrc.add_argument('--camera', type=int, help='Camera index (e.g. 0)')
     ap.add_argument('--no-yolo', action='store_true', help='Force disable YOLO (use HOG only)')
-    return ap.parse_args()
+    ap.add_argument('--line', type=parse_points, default=None, help='Safety line points, e.g. "0,300 640,320"')
+    ap.add_argument('--target-fps', type=float, default=0.0, help='Skip the detector on some frames to hold this FPS (0 = detect every frame)')
+    ap.add_argument('--motion-threshold', type=float, default=0.02, help='Changed-pixel fraction that forces a detection on a skipped frame')
+    add_backend_args(ap)
+    add_event_args(ap)
+    gh=ap.add_argument_group('headless batch mode')
+    gh.add_argument('--headless', action='store_true', help='Process --video once without a window and write events')
+    gh.add_argument('--events', type=str, default='events.jsonl', help='Event output (.jsonl or .csv)')
+    gh.add_argument('--workers', type=int, default=1, help='Split the video into this many time ranges processed in parallel')
+    args=ap.parse_args()
+    if args.headless and not args.video: ap.error('--headless requires --video')
+    return args
 
 if __name__ == '__main__':
     args=parse_args()
-    source = args.video if args.video else args.camera
-    monitor=MetroMonitor(source, force_no_yolo=args.no_yolo)
-    monitor.run()
+    if args.headless:
+        from batch_process import run_batch
+        if args.event_log or args.metrics_port: print("[WARN] --event-log/--metrics-port apply to live sources; batch events go to --events")
+        run_batch(args.video, args.events, workers=args.workers, line_points=args.line or [], force_no_yolo=args.no_yolo,
+                  target_fps=args.target_fps, motion_threshold=args.motion_threshold, detector_options=backend_options(args))
+    else:
+        source = args.video if args.video else args.camera
+        telemetry = telemetry_from_args(args)
+        monitor=MetroMonitor(source, force_no_yolo=args.no_yolo, target_fps=args.target_fps, motion_threshold=args.motion_threshold,
+                             detector_options=backend_options(args), recorder=telemetry.recorder() if telemetry else None)
+        if args.line: monitor.line_points=list(args.line)
+        try:
+            monitor.run()
+        finally:
+            if telemetry: telemetry.close()
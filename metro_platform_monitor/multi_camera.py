@@ -0,0 +1,224 @@
+"""Multi-camera inference server
+============================
+
+Runs many platform cameras against a single detector instead of one
+MetroMonitor process (and one YOLO model) per camera:
+
+  capture workers (one process per camera)
+      decode frames into a double-buffered shared-memory slot (latest frame wins)
+  server (this process, one PeopleDetector)
+      gathers the newest unseen frame of each camera, runs them through the
+      detector as one batch, and routes each camera's detections to its own
+      MetroMonitor (tracks, safety line, zones)
+  metrics stream
+      every --interval seconds, one JSON line per camera: processed FPS,
+      capture-to-result latency, skipped frames, live tracks, intrusions
+      and zone densities
+  events (optional, see events.py)
+      --event-log appends every camera's intrusion / density / zone count
+      events to one JSONL file; --metrics-port serves Prometheus counters and
+      per-stage latency histograms labelled by camera
+
+Cameras that produce frames faster than the detector can keep up simply have
+frames skipped (counted in the metrics); no queue grows.
+
+Usage:
+  python multi_camera.py --source north=rtsp://10.0.0.5/stream --source south=rtsp://10.0.0.6/stream
+  python multi_camera.py --source cam0=0 --source clip=platform.mp4 --metrics metrics.jsonl --no-yolo
+  python multi_camera.py --config cameras.json --event-log events.jsonl --metrics-port 9108
+
+cameras.json:
+  {"cameras": [{"name": "north", "source": "rtsp://...", "line": [[0,300],[1280,320]]}, ...]}
+"""
+from __future__ import annotations
+import argparse, json, multiprocessing as mp, queue, sys, time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import cv2, numpy as np
+
+from detector_backends import add_backend_args, backend_options
+from events import EventRecorder, Telemetry, add_event_args, telemetry_from_args
+from metro_monitor import MetroMonitor, PeopleDetector, StageStats, parse_points
+
+def open_source(source: str) -> cv2.VideoCapture:
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
+
+def capture_worker(index: int, source: str, ready, seqs, stamps, stop):
+    """Decode one camera into shared memory until stop is set.
+
+    The segment holds two frame slots; frame n goes to slot n % 2, then
+    stamps[index] and seqs[index] are set. Writing frame n + 2 overwrites slot
+    n % 2 before seqs[index] moves past n + 1, so a reader that copied frame n
+    keeps it only if seqs[index] is still n afterwards. Files loop and are
+    paced to their FPS.
+    """
+    cap = open_source(source)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        ready.put((index, None, None)); return
+    shm = shared_memory.SharedMemory(create=True, size=2*frame.nbytes)
+    slots = np.ndarray((2,)+frame.shape, np.uint8, buffer=shm.buf)
+    ready.put((index, shm.name, frame.shape))
+    fps = cap.get(cv2.CAP_PROP_FPS) if not source.isdigit() and not source.startswith(("rtsp:","http:","https:")) else 0
+    period = 1.0/fps if fps and fps > 0 else 0.0
+    next_t = time.perf_counter(); n = 0
+    try:
+        while not stop.is_set():
+            if frame is not None:
+                if frame.shape != slots.shape[1:]: frame = cv2.resize(frame, (slots.shape[2], slots.shape[1]))
+                n += 1; slots[n % 2] = frame; stamps[index] = time.time(); seqs[index] = n
+            if period:
+                next_t += period; delay = next_t - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+                else: next_t = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret and period:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0); ret, frame = cap.read()
+            if not ret: frame = None; time.sleep(0.01)
+    finally:
+        cap.release(); del slots; shm.close(); shm.unlink()
+
+class Camera:
+    """Server-side state of one camera: shared-memory view, analysis and metrics."""
+    def __init__(self, index: int, name: str, shm_name: str, shape: Tuple[int,...], detector: PeopleDetector,
+                 line: Optional[List[Tuple[int,int]]] = None, recorder: Optional[EventRecorder] = None):
+        self.index = index; self.name = name
+        self.shm = shared_memory.SharedMemory(name=shm_name)
+        self.slots = np.ndarray((2,)+tuple(shape), np.uint8, buffer=self.shm.buf)
+        self.monitor = MetroMonitor(None, detector=detector, frame_size=(shape[1], shape[0]), recorder=recorder)
+        self.recorder = recorder
+        self.monitor.line_points = list(line or [])
+        self.seq = 0; self.stats = StageStats(); self.intrusions = 0
+        self.last: Optional[Tuple[list,list,list]] = None  # (tracks, intrusions, densities) of the newest result
+
+    def grab(self, seqs, stamps) -> Optional[Tuple[np.ndarray, float]]:
+        """Copy the newest frame and its capture time if it is newer than the last one processed."""
+        seq = seqs[self.index]
+        if seq <= self.seq: return None
+        frame = self.slots[seq % 2].copy(); captured_at = stamps[self.index]
+        if seqs[self.index] != seq: return None  # a newer frame arrived and may have overwritten this slot; retry next round
+        if self.seq and seq > self.seq + 1:
+            self.stats.skipped += seq - self.seq - 1
+            if self.recorder: self.recorder.skipped(seq - self.seq - 1)
+        self.seq = seq
+        return frame, captured_at
+
+    def close(self):
+        del self.slots; self.shm.close()
+
+def write_metrics(out, cameras: List[Camera], interval_intrusions: Dict[str,int]):
+    now = time.time()
+    for cam in cameras:
+        tracks, _, densities = cam.last or ([], [], [])
+        out.write(json.dumps({
+            "time": round(now, 3), "camera": cam.name,
+            "fps": round(cam.stats.fps, 2), "latency_ms": round(cam.stats.latency_ms, 1), "skipped": cam.stats.skipped,
+            "tracks": len(tracks), "intrusions": interval_intrusions.get(cam.name, 0), "intrusions_total": cam.intrusions,
+            "zones": {name: {"count": c, "density": d, "threshold": th, "alert": over} for name, c, d, th, over in densities},
+        }) + "\n")
+    out.flush()
+
+def serve(sources: List[Tuple[str,str,Optional[List[Tuple[int,int]]]]], metrics_path: str = "-", interval: float = 5.0,
+          max_batch: int = 8, force_no_yolo: bool = False, duration: Optional[float] = None,
+          detector_options: Optional[Dict] = None, telemetry: Optional[Telemetry] = None):
+    """Run capture workers for (name, source, line) triples and stream per-camera metrics."""
+    ctx = mp.get_context("spawn")  # no forked copies of the detector / OpenCV state
+    ready = ctx.Queue(); stop = ctx.Event()
+    seqs = ctx.Array('q', len(sources), lock=False); stamps = ctx.Array('d', len(sources), lock=False)
+    workers = [ctx.Process(target=capture_worker, args=(i, src, ready, seqs, stamps, stop), name=f"capture-{name}", daemon=True)
+               for i, (name, src, _) in enumerate(sources)]
+    for w in workers: w.start()
+    detector = PeopleDetector(force_no_yolo=force_no_yolo, **(detector_options or {}))
+    fixed = getattr(detector.yolo, "batch_size", None)
+    if fixed and fixed < max_batch:
+        print(f"[WARN] The model was exported with batch {fixed}; --max-batch {max_batch} runs it {fixed} frame(s) at a time. "
+              f"Re-export with: python detector_backends.py export <weights> --batch {max_batch}")
+    cameras: Dict[int,Camera] = {}
+    for _ in sources:
+        try:
+            i, shm_name, shape = ready.get(timeout=30)
+        except queue.Empty:
+            print("[WARN] Some capture workers did not start within 30s"); break
+        name, src, line = sources[i]
+        if shm_name is None: print(f"[WARN] Cannot open source {src} ({name}); skipping"); continue
+        cameras[i] = Camera(i, name, shm_name, shape, detector, line, telemetry.recorder(name) if telemetry else None)
+        print(f"[INFO] {name}: {shape[1]}x{shape[0]} from {src}")
+    if not cameras:
+        stop.set(); raise SystemExit("[ERROR] No camera could be opened")
+
+    out = sys.stdout if metrics_path == "-" else open(metrics_path, "a")
+    order = sorted(cameras); start = 0; interval_intrusions: Dict[str,int] = {}
+    t_start = time.time(); next_emit = t_start + interval
+    try:
+        while duration is None or time.time() - t_start < duration:
+            # round-robin start so a full batch does not always favour the first cameras
+            batch = []
+            for i in order[start:] + order[:start]:
+                grabbed = cameras[i].grab(seqs, stamps)
+                if grabbed is None: continue
+                batch.append((cameras[i],) + grabbed)
+                if len(batch) >= max_batch: break
+            start = (start + 1) % len(order)
+            if not batch:
+                time.sleep(0.002)
+            else:
+                t0 = time.perf_counter()
+                results = detector.detect_batch([frame for _, frame, _ in batch],
+                                                [cam.monitor.detection_rois() for cam, _, _ in batch], [cam.index for cam, _, _ in batch])
+                detect_s = time.perf_counter() - t0
+                for (cam, _, captured_at), dets in zip(batch, results):
+                    _, tracks, intr, densities = cam.monitor.analyze(dets)
+                    cam.last = (tracks, intr, densities); cam.intrusions += len(intr)
+                    if intr: interval_intrusions[cam.name] = interval_intrusions.get(cam.name, 0) + len(intr)
+                    cam.stats.tick(time.time() - captured_at)
+                    if cam.recorder:  # every frame in the batch waited for the whole detector call
+                        cam.recorder.observe("detect", detect_s); cam.recorder.record(tracks, intr, densities)
+                        cam.recorder.observe("end_to_end", time.time() - captured_at)
+            if time.time() >= next_emit:
+                write_metrics(out, [cameras[i] for i in order], interval_intrusions)
+                interval_intrusions = {}; next_emit += interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        write_metrics(out, [cameras[i] for i in order], interval_intrusions)  # the partial last interval
+        stop.set()
+        for cam in cameras.values(): cam.close()
+        for w in workers: w.join(timeout=2.0)
+        if out is not sys.stdout: out.close()
+
+def parse_source(text: str) -> Tuple[str,str]:
+    """'name=source' -> (name, source); a bare source is named after itself."""
+    name, sep, source = text.partition("=")
+    return (name, source) if sep and not name.startswith(("rtsp:", "http:", "https:")) else (text, text)
+
+def load_config(path: str) -> List[Tuple[str,str,Optional[List[Tuple[int,int]]]]]:
+    with open(path) as f: cfg = json.load(f)
+    return [(c.get("name", str(c["source"])), str(c["source"]), [tuple(p) for p in c["line"]] if c.get("line") else None)
+            for c in cfg["cameras"]]
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Serve many platform cameras with one batched detector")
+    ap.add_argument('--source', action='append', type=parse_source, default=[], help='name=uri (camera index, file or stream); repeatable')
+    ap.add_argument('--config', type=str, help='JSON file with a "cameras" list of {name, source, line}')
+    ap.add_argument('--line', action='append', default=[], help='name="x,y x,y" safety line for a --source camera; repeatable')
+    ap.add_argument('--metrics', type=str, default='-', help='Metrics JSONL output (- for stdout)')
+    ap.add_argument('--interval', type=float, default=5.0, help='Seconds between metrics lines')
+    ap.add_argument('--max-batch', type=int, default=8, help='Frames per detector call')
+    ap.add_argument('--duration', type=float, default=None, help='Stop after this many seconds')
+    ap.add_argument('--no-yolo', action='store_true', help='Force disable YOLO (use HOG only)')
+    add_backend_args(ap)
+    add_event_args(ap)
+    args = ap.parse_args()
+    lines = {name: parse_points(pts) for name, _, pts in (l.partition("=") for l in args.line)}
+    sources = [(name, src, lines.get(name)) for name, src in args.source]
+    if args.config: sources += load_config(args.config)
+    if not sources: ap.error('give at least one --source or a --config')
+    return args, sources
+
+if __name__ == '__main__':
+    args, sources = parse_args()
+    telemetry = telemetry_from_args(args)
+    try:
+        serve(sources, args.metrics, args.interval, args.max_batch, args.no_yolo, args.duration, backend_options(args), telemetry)
+    finally:
+        if telemetry: telemetry.close()
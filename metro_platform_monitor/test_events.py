@@ -0,0 +1,54 @@
+"""
+Unit tests for the event recorder
+
+Run tests with: pytest test_events.py
+"""
+
+from events import EventBus, EventRecorder
+
+
+def zone(count):
+    return [("PLATFORM", count, count / 1000.0, 0.01, False)]
+
+
+def recorder():
+    published = []
+    bus = EventBus()
+    bus.subscribe(published.append)
+    return EventRecorder(bus, count_interval=1.0), published
+
+
+def counts(events):
+    return [(e["time_s"], e["count"]) for e in events if e["type"] == "zone_count"]
+
+
+class TestZoneCount:
+    """Throttling of zone_count events by count_interval."""
+
+    def test_change_within_interval_then_stable_is_sent_after_interval(self):
+        rec, published = recorder()
+        for t, count in [(0.0, 3), (0.4, 5), (0.8, 5), (1.2, 5), (1.6, 5)]:
+            rec.record([], [], zone(count), now=t, time_s=t)
+        assert counts(published) == [(0.0, 3), (1.2, 5)]
+
+    def test_change_within_interval_then_stream_ends_is_sent_on_close(self):
+        rec, published = recorder()
+        for t, count in [(0.0, 3), (0.4, 5), (0.8, 5)]:
+            rec.record([], [], zone(count), now=t, time_s=t)
+        assert counts(published) == [(0.0, 3)]
+        assert counts(rec.close()) == [(0.4, 5)]
+        assert counts(published) == [(0.0, 3), (0.4, 5)]
+        assert rec.close() == []
+
+    def test_change_reverted_within_interval_is_dropped(self):
+        rec, published = recorder()
+        for t, count in [(0.0, 3), (0.4, 5), (0.8, 3), (1.6, 3)]:
+            rec.record([], [], zone(count), now=t, time_s=t)
+        rec.close()
+        assert counts(published) == [(0.0, 3)]
+
+    def test_warmup_changes_are_not_held_back(self):
+        rec, published = recorder()
+        rec.record([], [], zone(3), now=0.0, emit=False, time_s=0.0)
+        rec.record([], [], zone(5), now=0.4, emit=False, time_s=0.4)
+        assert rec.close() == [] and published == []